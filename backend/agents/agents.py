@@ -48,8 +48,6 @@ class FlagPilotAgent:
         else:
             self._tools = tools
         self._agent = None
-        # Use shared PostgresCheckpointer for persistence across all agents
-        self._checkpointer = get_checkpointer()
     
     @property
     def llm(self) -> ChatOpenAI:
@@ -61,10 +59,13 @@ class FlagPilotAgent:
     def _build_agent(self):
         """Build the LangGraph agent with shared checkpointer"""
         if self._agent is None:
+            # Use shared PostgresCheckpointer for persistence across all agents.
+            # Resolved at first use: agents are created at import, before
+            # the lifespan has opened the PostgreSQL saver.
             self._agent = create_react_agent(
                 self.llm,
                 self._tools,
-                checkpointer=self._checkpointer
+                checkpointer=get_checkpointer()
             )
         return self._agent
     
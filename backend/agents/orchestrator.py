@@ -18,7 +18,7 @@ from loguru import logger
 import asyncio
 
 from config import settings
-from lib.persistence import get_checkpointer
+from lib.persistence import get_checkpointer, CheckpointerFactory
 
 
 class OrchestratorState(TypedDict):
@@ -190,7 +190,7 @@ I'm your AI-powered freelancer protection team. I can help you with:
     # Inject RAG and memory context
     try:
         from lib.rag import get_rag_pipeline
-        from lib.memory.manager import MemoryManager
+        from lib.memory.manager import get_memory_manager
         
         user_id = context.get("user_id") or context.get("id")
         if user_id:
@@ -201,8 +201,8 @@ I'm your AI-powered freelancer protection team. I can help you with:
                 context["RAG_CONTEXT"] = pipeline.get_context_for_query(rag_docs, max_tokens=1000)
             
             # Get user memory from Elasticsearch
-            memory = MemoryManager()
-            if memory.connected:
+            memory = get_memory_manager()
+            if await memory.ensure_ready():
                 profile = await memory.get_user_profile(user_id)
                 if profile.get("summary"):
                     context["USER_MEMORY"] = profile["summary"]
@@ -370,9 +370,9 @@ workflow.add_edge("plan", "execute")
 workflow.add_edge("execute", "synthesize")
 workflow.add_edge("synthesize", END)
 
-# Compile with persistent checkpointer (PostgreSQL or fallback to memory)
-checkpointer = get_checkpointer()
-orchestrator_graph = workflow.compile(checkpointer=checkpointer)
+# Compile with persistent checkpointer (PostgreSQL or fallback to memory).
+# Starts on the fallback; the lifespan rebinds it once PostgreSQL is open.
+orchestrator_graph = CheckpointerFactory.register(workflow.compile(checkpointer=get_checkpointer()))
 
 
 async def run_orchestrator(task: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
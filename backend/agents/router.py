@@ -8,7 +8,9 @@ Uses LLM to analyze task and select appropriate agents with confidence.
 from typing import List, Dict, Any, Tuple
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
+from cachetools import TTLCache
 from loguru import logger
+import hashlib
 import json
 
 
@@ -77,6 +79,16 @@ Example output:
 {{"agents": ["contract-guardian", "negotiation-assistant"], "reasoning": "Contract review with rate negotiation needed", "urgency": "medium"}}"""
 
 
+# Registry is static, so the rendered system prompt is too
+ROUTER_SYSTEM_MESSAGE = ROUTER_SYSTEM_PROMPT.format(agents_list="\n".join([
+    f"- {aid}: {info['description']}"
+    for aid, info in AGENT_REGISTRY.items()
+]))
+
+# LLM routing decisions by task digest; repeated tasks skip the LLM call
+_route_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+
 async def llm_route_agents(task: str, context: Dict[str, Any] = None) -> Tuple[List[str], str, str]:
     """
     Use LLM to intelligently route task to appropriate agents.
@@ -84,17 +96,17 @@ async def llm_route_agents(task: str, context: Dict[str, Any] = None) -> Tuple[L
     """
     from config import get_llm
     
-    # Build agents list for prompt
-    agents_list = "\n".join([
-        f"- {aid}: {info['description']}" 
-        for aid, info in AGENT_REGISTRY.items()
-    ])
+    cache_key = hashlib.blake2b(task.encode("utf-8"), digest_size=16).digest()
+    cached = _route_cache.get(cache_key)
+    if cached is not None:
+        agents, reasoning, urgency = cached
+        return list(agents), reasoning, urgency
     
     llm = get_llm(temperature=0.1)  # Low temp for consistent routing
     
     try:
         response = await llm.ainvoke([
-            SystemMessage(content=ROUTER_SYSTEM_PROMPT.format(agents_list=agents_list)),
+            SystemMessage(content=ROUTER_SYSTEM_MESSAGE),
             HumanMessage(content=f"Route this task to the appropriate agents:\n\n{task}")
         ])
         
@@ -122,6 +134,8 @@ async def llm_route_agents(task: str, context: Dict[str, Any] = None) -> Tuple[L
             # Fallback to default agents
             valid_agents = ["profile-analyzer", "communication-coach"]
         
+        # Keyword fallbacks below are not cached, so a transient failure isn't pinned
+        _route_cache[cache_key] = (tuple(valid_agents), reasoning, urgency)
         return valid_agents, reasoning, urgency
         
     except Exception as e:
@@ -36,6 +36,8 @@ class Settings(BaseSettings):
     # PostgreSQL (LangGraph Checkpoints + Auth)
     # ===========================================
     database_url: Optional[str] = None
+    checkpoint_pool_min_size: int = 5
+    checkpoint_pool_max_size: int = 50
 
     # ===========================================
     # Elasticsearch (Wisdom, Profiles, Chat Logs)
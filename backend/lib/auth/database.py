@@ -12,6 +12,10 @@ import asyncpg
 from loguru import logger
 
 
+# Captured once at import
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+
 class DatabasePool:
     """
     Async PostgreSQL connection pool.
@@ -24,12 +28,11 @@ class DatabasePool:
     async def get_pool(cls) -> asyncpg.Pool:
         """Get or create the connection pool."""
         if cls._pool is None:
-            database_url = os.getenv("DATABASE_URL")
-            if not database_url:
+            if not DATABASE_URL:
                 raise RuntimeError("DATABASE_URL environment variable not set")
             
             cls._pool = await asyncpg.create_pool(
-                database_url,
+                DATABASE_URL,
                 min_size=2,
                 max_size=10,
                 command_timeout=10,
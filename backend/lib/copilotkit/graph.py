@@ -13,7 +13,7 @@ from langgraph.types import Command
 from langchain_core.messages import AIMessage, HumanMessage
 from loguru import logger
 
-from lib.persistence import get_checkpointer
+from lib.persistence import get_checkpointer, CheckpointerFactory
 
 # CopilotKit State import for AG-UI compatibility
 try:
@@ -303,6 +303,6 @@ workflow.add_edge("orchestrate", "credit_deduct")
 workflow.add_edge("credit_deduct", "finalize")
 workflow.add_edge("finalize", END)
 
-# Compile with persistent checkpointer (PostgreSQL or fallback to memory)
-checkpointer = get_checkpointer()
-graph = workflow.compile(checkpointer=checkpointer)
+# Compile with persistent checkpointer (PostgreSQL or fallback to memory).
+# Starts on the fallback; the lifespan rebinds it once PostgreSQL is open.
+graph = CheckpointerFactory.register(workflow.compile(checkpointer=get_checkpointer()))
@@ -7,12 +7,67 @@ Triple-Tiered Memory for FlagPilot:
 3. Experience Gallery (Global Wisdom) - Anonymized shared learnings
 """
 
-from elasticsearch import Elasticsearch
+from elasticsearch import Elasticsearch, ConnectionError as ESConnectionError, ConnectionTimeout
+from elasticsearch.serializer import JSONSerializer
+from openai import AsyncOpenAI
 from loguru import logger
 from config import settings
-from typing import Optional, List, Dict, Any
-import datetime
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
+import functools
+import hashlib
+import threading
+import time
 import uuid
+import httpx
+import orjson
+
+
+# Shared LLM client for profile synthesis (reuses the HTTPX connection pool)
+_openai_client: Optional[AsyncOpenAI] = None
+_openai_lock = threading.Lock()
+
+
+def _get_openai() -> AsyncOpenAI:
+    """Get or create the shared AsyncOpenAI client."""
+    global _openai_client
+    if _openai_client is None:
+        with _openai_lock:
+            if _openai_client is None:
+                _openai_client = AsyncOpenAI(
+                    api_key=settings.openrouter_api_key,
+                    base_url=settings.openrouter_base_url,
+                    http_client=httpx.AsyncClient(
+                        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                        timeout=60.0
+                    )
+                )
+    return _openai_client
+
+
+# Static instructions go first so providers can cache the prompt prefix
+PROFILE_SYNTHESIS_PROMPT = """You are a profile synthesis assistant. Create concise user profiles.
+
+Merge the NEW INTERACTION into the EXISTING USER PROFILE.
+Focus on identifying:
+1. Behavioral patterns (e.g., priorities, tone).
+2. Rules & Constraints (e.g., job preferences, specific NO-GOs).
+3. Important History (e.g., companies mentioned, problems solved).
+
+Return a concise, bulleted summary (Max 500 words) that will serve as the NEW PROFILE.
+Do not include sensitive PII."""
+
+
+class OrjsonSerializer(JSONSerializer):
+    """Elasticsearch JSON serializer backed by orjson (encodes straight to bytes)."""
+
+    def dumps(self, data: Any) -> bytes:
+        if isinstance(data, str):
+            return data.encode("utf-8")
+        return orjson.dumps(data, default=self.default)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
 
 
 class MemoryManager:
@@ -27,16 +82,33 @@ class MemoryManager:
     GALLERY_INDEX = "flagpilot_experience_gallery"
     WISDOM_INDEX = "flagpilot_global_wisdom"
     
+    # Circuit breaker: fail fast for a while after repeated transport failures
+    CIRCUIT_FAILURE_THRESHOLD = 5
+    CIRCUIT_RECOVERY_TIMEOUT = 30.0
+
+    # How long a caller waits on the in-flight connection probe
+    READY_WAIT_TIMEOUT = 2.0
+    
     def __init__(self, es_host: str = None, es_port: int = None):
         """
-        Initialize the Memory Manager with Elasticsearch connection.
-        Falls back gracefully if ES is unavailable.
+        Initialize the Memory Manager's Elasticsearch client.
+        The connection is established lazily by ensure_ready().
         """
         self.es_host = es_host or settings.es_host
         self.es_port = es_port or settings.es_port
         self.es_url = f"http://{self.es_host}:{self.es_port}"
         self.connected = False
         self.client = None
+        self._failures = 0
+        self._last_failure = 0.0
+        self._circuit_open_until = 0.0
+
+        # Indices created with required user_id routing; searches on older
+        # (unrouted) indices must fan out to every shard
+        self._routed_indices: set = set()
+
+        # Analyzed search terms for repeated gallery queries
+        self._analyze_cached = functools.lru_cache(maxsize=2048)(self._analyze)
         
         try:
             self.client = Elasticsearch(
@@ -44,10 +116,48 @@ class MemoryManager:
                 verify_certs=False,
                 request_timeout=10,
                 retry_on_timeout=True,
-                max_retries=3
+                max_retries=3,
+                http_compress=True,
+                serializer=OrjsonSerializer()
             )
-            # Test connection
-            if self.client.ping():
+        except Exception as e:
+            logger.warning(f"MemoryManager: ES client setup failed: {e}")
+        
+        # Connection + index setup happen lazily in ensure_ready (no network here)
+        self._ready = False
+        self._probe: Optional[asyncio.Future] = None
+    
+    async def ensure_ready(self) -> bool:
+        """
+        Connect and create indices on first use.
+        Returns True if ES is usable; retries after the circuit timeout on failure.
+        """
+        if not self._ready and self.client is not None:
+            if time.monotonic() < self._circuit_open_until:
+                return False
+            # One probe at a time: callers join the in-flight probe, and the
+            # shield keeps it running when a caller's wait is cancelled
+            if self._probe is None or self._probe.done():
+                self._probe = asyncio.ensure_future(self._run_probe())
+            try:
+                await asyncio.wait_for(asyncio.shield(self._probe), timeout=self.READY_WAIT_TIMEOUT)
+            except asyncio.TimeoutError:
+                return False
+        return self._es_available()
+
+    async def _run_probe(self):
+        """Internal: Connect in a worker thread and open the circuit on failure."""
+        await asyncio.to_thread(self._connect)
+        if self.connected:
+            self._ready = True
+        else:
+            self._circuit_open_until = time.monotonic() + self.CIRCUIT_RECOVERY_TIMEOUT
+    
+    def _connect(self):
+        """Internal: Ping ES and ensure indices exist (blocking; run in a thread)."""
+        try:
+            # Short probe: the client's default timeout and retries add up to ~40s
+            if self.client.options(request_timeout=1, max_retries=0).ping():
                 self.connected = True
                 logger.info(f"MemoryManager connected to ES at {self.es_url}")
                 self._ensure_indices()
@@ -57,24 +167,49 @@ class MemoryManager:
             logger.warning(f"MemoryManager: ES connection failed: {e}")
             self.connected = False
     
+    def _es_available(self) -> bool:
+        """Internal: True if connected and the circuit breaker is closed."""
+        return self.connected and time.monotonic() >= self._circuit_open_until
+    
+    def _record_failure(self, error: Exception):
+        """Internal: Count transport failures and open the circuit past the threshold."""
+        if not isinstance(error, (ESConnectionError, ConnectionTimeout)):
+            return
+        now = time.monotonic()
+        if now - self._last_failure > self.CIRCUIT_RECOVERY_TIMEOUT:
+            self._failures = 0
+        self._last_failure = now
+        self._failures += 1
+        if self._failures >= self.CIRCUIT_FAILURE_THRESHOLD:
+            self._failures = 0
+            self._circuit_open_until = now + self.CIRCUIT_RECOVERY_TIMEOUT
+            logger.warning("MemoryManager: ES circuit open for {}s", self.CIRCUIT_RECOVERY_TIMEOUT)
+    
     def _ensure_indices(self):
         """Create indices if they don't exist."""
         if not self.connected:
             return
-            
+
+        # Timestamps are written as epoch millis; ISO strings from older docs still parse
+        date_field = {"type": "date", "format": "epoch_millis||strict_date_optional_time"}
+
+        # Per-user indices are routed by user_id so a user's docs share one shard;
+        # global wisdom keeps default routing
         indices = {
             self.PROFILE_INDEX: {
+                "_routing": {"required": True},
                 "properties": {
                     "user_id": {"type": "keyword"},
                     "summary": {"type": "text"},
                     "preferences": {"type": "object", "enabled": False},
                     "learning_style": {"type": "keyword"},
                     "risk_tolerance": {"type": "keyword"},
-                    "created_at": {"type": "date"},
-                    "last_updated": {"type": "date"}
+                    "created_at": date_field,
+                    "last_updated": date_field
                 }
             },
             self.CHAT_INDEX: {
+                "_routing": {"required": True},
                 "properties": {
                     "user_id": {"type": "keyword"},
                     "session_id": {"type": "keyword"},
@@ -82,19 +217,21 @@ class MemoryManager:
                     "content": {"type": "text"},
                     "agent_id": {"type": "keyword"},
                     "metadata": {"type": "object", "enabled": False},
-                    "timestamp": {"type": "date"}
+                    "timestamp": date_field
                 }
             },
             self.GALLERY_INDEX: {
+                "_routing": {"required": True},
                 "properties": {
                     "user_id": {"type": "keyword"},
                     "task_type": {"type": "keyword"},
                     "input_query": {"type": "text"},
                     "outcome": {"type": "text"},
                     "lesson": {"type": "text"},
+                    "search_terms": {"type": "keyword"},  # Pre-analyzed lesson + query tokens
                     "feedback_score": {"type": "integer"},
                     "is_public": {"type": "boolean"},
-                    "created_at": {"type": "date"}
+                    "created_at": date_field
                 }
             },
             self.WISDOM_INDEX: {
@@ -104,8 +241,8 @@ class MemoryManager:
                     "source_count": {"type": "integer"},  # How many users contributed
                     "confidence_score": {"type": "float"},
                     "tags": {"type": "keyword"},
-                    "created_at": {"type": "date"},
-                    "last_updated": {"type": "date"}
+                    "created_at": date_field,
+                    "last_updated": date_field
                 }
             }
         }
@@ -118,8 +255,25 @@ class MemoryManager:
                         body={"mappings": mapping}
                     )
                     logger.info(f"Created index: {index_name}")
+            
+            # Indices created before user_id routing hold docs routed by _id;
+            # routed searches would miss them until the index is rebuilt
+            res = self.client.indices.get_mapping(index=self.CHAT_INDEX)
+            mappings = res.get(self.CHAT_INDEX, {}).get("mappings", {})
+            if mappings.get("_routing", {}).get("required"):
+                self._routed_indices.add(self.CHAT_INDEX)
+            else:
+                logger.warning(
+                    "MemoryManager: {} predates user_id routing; searching all shards "
+                    "(rebuild the index to enable routed searches)",
+                    self.CHAT_INDEX
+                )
         except Exception as e:
-            logger.error(f"Failed to ensure indices: {e}")
+            logger.error("Failed to ensure indices: {}", e)
+    
+    def _search_routing(self, index: str, user_id: str) -> Optional[str]:
+        """Internal: Routing for a per-user search, or None to search every shard."""
+        return user_id if index in self._routed_indices else None
     
     # ==========================================
     # User Profile Methods
@@ -127,16 +281,17 @@ class MemoryManager:
     
     async def get_user_profile(self, user_id: str) -> Dict[str, Any]:
         """Retrieve the full user profile."""
-        if not self.connected:
+        if not await self.ensure_ready():
             return {"user_id": user_id, "summary": "", "preferences": {}}
             
         try:
-            res = self.client.get(index=self.PROFILE_INDEX, id=user_id, ignore=[404])
+            res = self.client.get(index=self.PROFILE_INDEX, id=user_id, routing=user_id, ignore=[404])
             if res.get("found"):
                 return res["_source"]
             return {"user_id": user_id, "summary": "", "preferences": {}}
         except Exception as e:
-            logger.error(f"Error getting user profile: {e}")
+            self._record_failure(e)
+            logger.error("Error getting user profile for {}: {}", user_id, e)
             return {"user_id": user_id, "summary": "", "preferences": {}}
     
     async def get_current_user_profile(self, user_id: str) -> str:
@@ -152,35 +307,47 @@ class MemoryManager:
         **kwargs
     ):
         """Update user profile with partial updates."""
-        if not self.connected:
+        if not await self.ensure_ready():
             logger.warning("ES not connected, skipping profile update")
             return False
             
         try:
-            now = datetime.datetime.utcnow().isoformat()
-            
-            # Get existing profile
-            existing = await self.get_user_profile(user_id)
-            
-            # Merge updates
-            body = {
-                "user_id": user_id,
-                "summary": summary if summary is not None else existing.get("summary", ""),
-                "preferences": preferences if preferences is not None else existing.get("preferences", {}),
-                "last_updated": now,
-                **kwargs
-            }
-            
-            if not existing.get("created_at"):
-                body["created_at"] = now
-            else:
-                body["created_at"] = existing["created_at"]
-            
-            self.client.index(index=self.PROFILE_INDEX, id=user_id, body=body)
+            now = int(time.time() * 1000)
+            
+            # Only overwrite the fields that were provided
+            fields = {"last_updated": now, **kwargs}
+            if summary is not None:
+                fields["summary"] = summary
+            if preferences is not None:
+                fields["preferences"] = preferences
+
+            # Scripted upsert: created_at is only set on insert, no read needed
+            self.client.update(
+                index=self.PROFILE_INDEX,
+                id=user_id,
+                routing=user_id,
+                body={
+                    "script": {
+                        "source": (
+                            "for (entry in params.fields.entrySet()) "
+                            "{ ctx._source[entry.getKey()] = entry.getValue(); }"
+                        ),
+                        "params": {"fields": fields}
+                    },
+                    "upsert": {
+                        "user_id": user_id,
+                        "summary": "",
+                        "preferences": {},
+                        "created_at": now,
+                        **fields
+                    }
+                }
+            )
             logger.info(f"Updated profile for user: {user_id}")
             return True
         except Exception as e:
-            logger.error(f"Error updating user profile: {e}")
+            self._record_failure(e)
+            logger.error("Error updating user profile for {}: {}", user_id, e)
             return False
     
     # ==========================================
@@ -197,7 +364,7 @@ class MemoryManager:
         metadata: Dict = None
     ) -> str:
         """Save a chat message to history."""
-        if not self.connected:
+        if not await self.ensure_ready():
             return ""
             
         try:
@@ -209,14 +376,15 @@ class MemoryManager:
                 "content": content,
                 "agent_id": agent_id,
                 "metadata": metadata or {},
-                "timestamp": datetime.datetime.utcnow().isoformat()
+                "timestamp": int(time.time() * 1000)
             }
             
-            self.client.index(index=self.CHAT_INDEX, id=chat_id, body=body)
+            self.client.index(index=self.CHAT_INDEX, id=chat_id, routing=user_id, body=body)
             logger.debug(f"Saved chat message for user {user_id}")
             return chat_id
         except Exception as e:
-            logger.error(f"Error saving chat: {e}")
+            self._record_failure(e)
+            logger.error("Error saving chat for user {}: {}", user_id, e)
             return ""
     
     async def get_chat_history(
@@ -226,7 +394,7 @@ class MemoryManager:
         limit: int = 50
     ) -> List[Dict]:
         """Get chat history for a user, optionally filtered by session."""
-        if not self.connected:
+        if not await self.ensure_ready():
             return []
             
         try:
@@ -241,9 +409,11 @@ class MemoryManager:
             
             res = self.client.search(
                 index=self.CHAT_INDEX,
+                routing=self._search_routing(self.CHAT_INDEX, user_id),
                 body={
                     "size": limit,
                     "query": query,
+                    "_source": {"includes": ["role", "content", "timestamp"]},
                     "sort": [{"timestamp": "desc"}]
                 }
             )
@@ -251,20 +421,32 @@ class MemoryManager:
             messages = [hit["_source"] for hit in res.get("hits", {}).get("hits", [])]
             return list(reversed(messages))  # Chronological order
         except Exception as e:
-            logger.error(f"Error getting chat history: {e}")
+            self._record_failure(e)
+            logger.error("Error getting chat history for user {}: {}", user_id, e)
             return []
     
     async def get_recent_sessions(self, user_id: str, limit: int = 10) -> List[str]:
-        """Get recent session IDs for a user."""
-        if not self.connected:
+        """Get recent session IDs for a user (sessions active in the last 30 days)."""
+        if not await self.ensure_ready():
             return []
             
         try:
+            # Filter context + day-rounded range keeps the working set bounded
+            # and lets the shard request cache serve repeat calls (size=0)
             res = self.client.search(
                 index=self.CHAT_INDEX,
+                routing=self._search_routing(self.CHAT_INDEX, user_id),
+                request_cache=True,
                 body={
                     "size": 0,
-                    "query": {"term": {"user_id": user_id}},
+                    "query": {
+                        "bool": {
+                            "filter": [
+                                {"term": {"user_id": user_id}},
+                                {"range": {"timestamp": {"gte": "now-30d/d"}}}
+                            ]
+                        }
+                    },
                     "aggs": {
                         "sessions": {
                             "terms": {
@@ -283,13 +465,31 @@ class MemoryManager:
             buckets = res.get("aggregations", {}).get("sessions", {}).get("buckets", [])
             return [b["key"] for b in buckets]
         except Exception as e:
-            logger.error(f"Error getting sessions: {e}")
+            self._record_failure(e)
+            logger.error("Error getting sessions for user {}: {}", user_id, e)
             return []
     
     # ==========================================
     # Experience Gallery Methods
     # ==========================================
     
+    def _analyze(self, text: str) -> Tuple[str, ...]:
+        """Internal: Run text through the english analyzer, returning unique tokens."""
+        res = self.client.indices.analyze(analyzer="english", text=text)
+        return tuple(dict.fromkeys(t["token"] for t in res.get("tokens", [])))
+
+    def _try_analyze(self, text: str, analyze=None) -> Optional[Tuple[str, ...]]:
+        """
+        Internal: _analyze (or the given cached variant), or None if the analyze call fails.
+        Callers then fall back to full-text matching rather than losing the operation.
+        """
+        try:
+            return (analyze or self._analyze)(text)
+        except Exception as e:
+            self._record_failure(e)
+            logger.warning("Analyze failed, skipping search terms: {}", e)
+            return None
+
     async def save_experience(
         self,
         user_id: str,
@@ -300,7 +500,7 @@ class MemoryManager:
         task_type: str = "freelancing"
     ) -> bool:
         """Save a successful experience to the gallery."""
-        if not self.connected:
+        if not await self.ensure_ready():
             return False
             
         try:
@@ -312,10 +512,14 @@ class MemoryManager:
                 "lesson": lesson,
                 "feedback_score": score,
                 "is_public": score > 0,
-                "created_at": datetime.datetime.utcnow().isoformat()
+                "created_at": int(time.time() * 1000)
             }
+            # Without search_terms the experience is still found by the full-text fallback
+            terms = self._try_analyze(f"{lesson} {task}")
+            if terms is not None:
+                body["search_terms"] = list(terms)
             
-            self.client.index(index=self.GALLERY_INDEX, body=body)
+            self.client.index(index=self.GALLERY_INDEX, routing=user_id, body=body)
             logger.info(f"Saved experience from user {user_id}")
             
             # If positive, also contribute to global wisdom
@@ -324,7 +528,8 @@ class MemoryManager:
             
             return True
         except Exception as e:
-            logger.error(f"Error saving experience: {e}")
+            self._record_failure(e)
+            logger.error("Error saving experience for user {}: {}", user_id, e)
             return False
     
     async def search_similar_experiences(
@@ -334,32 +539,53 @@ class MemoryManager:
         task_type: str = None
     ) -> List[Dict]:
         """Search for similar experiences in the gallery."""
-        if not self.connected:
+        if not await self.ensure_ready():
             return []
             
         try:
-            must = [
-                {"multi_match": {"query": query, "fields": ["input_query", "lesson", "outcome"]}},
-                {"term": {"is_public": True}}
-            ]
+            filters = [{"term": {"is_public": True}}]
             
             if task_type:
-                must.append({"term": {"task_type": task_type}})
-            
-            res = self.client.search(
-                index=self.GALLERY_INDEX,
-                body={
-                    "size": limit,
-                    "query": {"bool": {"must": must}},
-                    "sort": [{"feedback_score": "desc"}]
-                }
-            )
-            
-            return [hit["_source"] for hit in res.get("hits", {}).get("hits", [])]
+                filters.append({"term": {"task_type": task_type}})
+            
+            # Match pre-analyzed search_terms in filter context (query-cacheable);
+            # repeated queries skip the analyze round-trip via the LRU cache
+            terms = self._try_analyze(query, self._analyze_cached)
+            if terms:
+                hits = self._search_experiences(limit, filters + [{
+                    "terms_set": {
+                        "search_terms": {
+                            "terms": list(terms),
+                            "minimum_should_match_script": {"source": "Math.max(1, params.num_terms / 2)"}
+                        }
+                    }
+                }])
+                if hits:
+                    return hits
+            
+            # Fall back to full-text matching (documents saved before search_terms)
+            return self._search_experiences(limit, filters + [
+                {"multi_match": {"query": query, "fields": ["input_query", "lesson", "outcome"]}}
+            ])
         except Exception as e:
-            logger.error(f"Error searching experiences: {e}")
+            self._record_failure(e)
+            logger.error("Error searching experiences: {}", e)
             return []
     
+    def _search_experiences(self, limit: int, filters: List[Dict]) -> List[Dict]:
+        """Internal: Run a filtered gallery search sorted by feedback score."""
+        res = self.client.search(
+            index=self.GALLERY_INDEX,
+            body={
+                "size": limit,
+                "query": {"bool": {"filter": filters}},
+                # Callers only read these; skip the (potentially large) outcome text
+                "_source": {"includes": ["lesson", "input_query", "feedback_score"]},
+                "sort": [{"feedback_score": "desc"}]
+            }
+        )
+        return [hit["_source"] for hit in res.get("hits", {}).get("hits", [])]
+    
     # ==========================================
     # Global Wisdom Methods
     # ==========================================
@@ -367,55 +593,41 @@ class MemoryManager:
     async def _contribute_to_wisdom(self, category: str, insight: str):
         """Internal: Add/update wisdom from a positive experience."""
         try:
-            # Search for similar existing wisdom
-            res = self.client.search(
+            now = int(time.time() * 1000)
+
+            # Deterministic ID per (category, normalized insight) makes the
+            # upsert atomic and race-free in a single round-trip
+            normalized = " ".join(insight.lower().split())
+            doc_id = hashlib.blake2b(
+                f"{category}:{normalized}".encode("utf-8"), digest_size=16
+            ).hexdigest()
+
+            self.client.update(
                 index=self.WISDOM_INDEX,
+                id=doc_id,
                 body={
-                    "size": 1,
-                    "query": {
-                        "bool": {
-                            "must": [
-                                {"term": {"category": category}},
-                                {"match": {"insight": insight}}
-                            ]
-                        }
-                    }
-                }
-            )
-            
-            hits = res.get("hits", {}).get("hits", [])
-            
-            if hits and hits[0]["_score"] > 5:  # High similarity
-                # Update existing
-                doc_id = hits[0]["_id"]
-                existing = hits[0]["_source"]
-                self.client.update(
-                    index=self.WISDOM_INDEX,
-                    id=doc_id,
-                    body={
-                        "doc": {
-                            "source_count": existing.get("source_count", 1) + 1,
-                            "confidence_score": min(1.0, existing.get("confidence_score", 0.5) + 0.1),
-                            "last_updated": datetime.datetime.utcnow().isoformat()
-                        }
-                    }
-                )
-            else:
-                # Create new wisdom
-                self.client.index(
-                    index=self.WISDOM_INDEX,
-                    body={
+                    "script": {
+                        "source": (
+                            "ctx._source.source_count += 1; "
+                            "ctx._source.confidence_score = Math.min(1.0, ctx._source.confidence_score + 0.1); "
+                            "ctx._source.last_updated = params.now"
+                        ),
+                        "params": {"now": now}
+                    },
+                    "upsert": {
                         "category": category,
                         "insight": insight,
                         "source_count": 1,
                         "confidence_score": 0.5,
                         "tags": [category],
-                        "created_at": datetime.datetime.utcnow().isoformat(),
-                        "last_updated": datetime.datetime.utcnow().isoformat()
+                        "created_at": now,
+                        "last_updated": now
                     }
-                )
+                }
+            )
         except Exception as e:
-            logger.debug(f"Wisdom contribution error (non-critical): {e}")
+            self._record_failure(e)
+            logger.debug("Wisdom contribution error (non-critical): {}", e)
     
     async def get_global_wisdom(
         self,
@@ -425,7 +637,7 @@ class MemoryManager:
         min_confidence: float = 0.3
     ) -> List[Dict]:
         """Get global wisdom insights."""
-        if not self.connected:
+        if not await self.ensure_ready():
             return []
             
         try:
@@ -451,7 +663,8 @@ class MemoryManager:
             
             return [hit["_source"] for hit in res.get("hits", {}).get("hits", [])]
         except Exception as e:
-            logger.error(f"Error getting global wisdom: {e}")
+            self._record_failure(e)
+            logger.error("Error getting global wisdom: {}", e)
             return []
     
     async def add_wisdom(
@@ -462,11 +675,11 @@ class MemoryManager:
         confidence: float = 0.5
     ) -> bool:
         """Manually add a wisdom entry."""
-        if not self.connected:
+        if not await self.ensure_ready():
             return False
             
         try:
-            now = datetime.datetime.utcnow().isoformat()
+            now = int(time.time() * 1000)
             self.client.index(
                 index=self.WISDOM_INDEX,
                 body={
@@ -482,7 +695,8 @@ class MemoryManager:
             logger.info(f"Added wisdom: {category}")
             return True
         except Exception as e:
-            logger.error(f"Error adding wisdom: {e}")
+            self._record_failure(e)
+            logger.error("Error adding wisdom: {}", e)
             return False
     
     # ==========================================
@@ -500,45 +714,41 @@ class MemoryManager:
         This is how the system 'learns' about the user.
         """
         try:
-            from openai import AsyncOpenAI
-            from config import settings
-            
-            client = AsyncOpenAI(
-                api_key=settings.openrouter_api_key,
-                base_url=settings.openrouter_base_url
-            )
+            client = _get_openai()
             
             prompt = f"""
-Merge the following NEW INTERACTION into the EXISTING USER PROFILE.
-Focus on identifying:
-1. Behavioral patterns (e.g., priorities, tone).
-2. Rules & Constraints (e.g., job preferences, specific NO-GOs).
-3. Important History (e.g., companies mentioned, problems solved).
-
 EXISTING PROFILE:
 {current_profile if current_profile else "No previous profile."}
 
 NEW INTERACTION:
 {interaction}
-
-Return a concise, bulleted summary (Max 500 words) that will serve as the NEW PROFILE.
-Do not include sensitive PII.
 """
             
             response = await client.chat.completions.create(
                 model=settings.openrouter_model,
                 messages=[
-                    {"role": "system", "content": "You are a profile synthesis assistant. Create concise user profiles."},
+                    {"role": "system", "content": PROFILE_SYNTHESIS_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=800
             )
             
+            # Provider prompt caching reuses the static system prefix
+            usage = response.usage
+            if usage is not None:
+                details = getattr(usage, "prompt_tokens_details", None)
+                logger.debug(
+                    "Profile synthesis tokens: prompt={} cached={} completion={}",
+                    usage.prompt_tokens,
+                    getattr(details, "cached_tokens", 0) or 0,
+                    usage.completion_tokens
+                )
+            
             new_profile = response.choices[0].message.content
             await self.update_user_profile(user_id, summary=new_profile)
             
         except Exception as e:
-            logger.error(f"Failed to synthesize profile: {e}")
+            logger.error("Failed to synthesize profile for user {}: {}", user_id, e)
     
     # ==========================================
     # Health & Status
@@ -570,16 +780,21 @@ Do not include sensitive PII.
             return {}
             
         try:
-            stats = {}
-            for index in [self.PROFILE_INDEX, self.CHAT_INDEX, self.GALLERY_INDEX, self.WISDOM_INDEX]:
-                try:
-                    count = self.client.count(index=index)
-                    stats[index] = count.get("count", 0)
-                except:
-                    stats[index] = 0
-            return stats
+            indices = [self.PROFILE_INDEX, self.CHAT_INDEX, self.GALLERY_INDEX, self.WISDOM_INDEX]
+            
+            # One _stats/docs request serves all indices from per-shard counters
+            res = self.client.indices.stats(
+                index=",".join(indices),
+                metric="docs",
+                ignore_unavailable=True
+            )
+            per_index = res.get("indices", {})
+            return {
+                index: per_index.get(index, {}).get("primaries", {}).get("docs", {}).get("count", 0)
+                for index in indices
+            }
         except Exception as e:
-            logger.error(f"Error getting stats: {e}")
+            logger.error("Error getting stats: {}", e)
             return {}
 
 
@@ -4,7 +4,8 @@ Persistence Module
 State persistence and checkpointing for LangGraph.
 """
 
+from lib.persistence.pool import get_pg_pool, open_pg_pool, close_pg_pool
 from lib.persistence.checkpointer import get_checkpointer, CheckpointerFactory
 from lib.persistence.long_term_memory import get_long_term_memory, LongTermMemoryStore
 
-__all__ = ["get_checkpointer", "CheckpointerFactory", "get_long_term_memory", "LongTermMemoryStore"]
+__all__ = ["get_pg_pool", "open_pg_pool", "close_pg_pool", "get_checkpointer", "CheckpointerFactory", "get_long_term_memory", "LongTermMemoryStore"]
@@ -2,13 +2,22 @@
 Persistent Checkpointer - PostgreSQL Backend (Async)
 ======================================================
 Production-ready checkpointer with PostgreSQL for state persistence.
-Uses AsyncPostgresSaver for proper async streaming support with CopilotKit.
+Uses AsyncPostgresSaver over the shared AsyncConnectionPool (see pool.py)
+for proper async streaming support with CopilotKit.
+
+AsyncPostgresSaver binds to the running event loop, so it can only be built
+inside the FastAPI lifespan. Graphs compiled at import time start on the
+MemorySaver fallback and register() themselves; open() then creates the
+saver, runs setup() and rebinds every registered graph to it.
 """
 
-import os
-from typing import Optional
+import asyncio
+import threading
+from typing import List, Optional
 from loguru import logger
 
+from lib.persistence.pool import get_pg_pool, open_pg_pool, close_pg_pool
+
 # Use async checkpointer for streaming compatibility
 try:
     from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
@@ -20,62 +29,108 @@ except ImportError:
 from langgraph.checkpoint.memory import MemorySaver
 
 
+# Double-checked locks: one fallback per process, one open()
+_create_lock = threading.Lock()
+_open_lock = asyncio.Lock()
+
+
 class CheckpointerFactory:
     """
     Factory for creating checkpointers.
-    Uses AsyncPostgresSaver for async streaming operations.
+    Uses AsyncPostgresSaver backed by the shared AsyncConnectionPool.
     Falls back to MemorySaver in development if PostgreSQL unavailable.
     """
-    
+
     _instance = None
     _fallback: Optional[MemorySaver] = None
-    _context_manager = None
-    
+    _graphs: List = []
+    _opened = False
+
+    # Boot-time retries for a transient PostgreSQL error (seconds between tries)
+    OPEN_RETRY_DELAYS = (1.0, 2.0, 4.0)
+
     @classmethod
     def get_checkpointer(cls):
         """
-        Get the production checkpointer (PostgreSQL async) or fallback to memory.
+        Get the production checkpointer (PostgreSQL async) once open() has run,
+        otherwise the MemorySaver fallback.
         """
         # Return existing instance
         if cls._instance is not None:
             return cls._instance
-        
-        database_url = os.environ.get("DATABASE_URL")
-        
-        if database_url and HAS_ASYNC_PG:
-            try:
-                # AsyncPostgresSaver.from_conn_string() returns a context manager
-                # We need to enter it to get the actual saver instance
-                cls._context_manager = AsyncPostgresSaver.from_conn_string(database_url)
-                cls._instance = cls._context_manager.__enter__()
-                # Run setup synchronously (tables creation is sync-safe)
-                cls._instance.setup()
-                logger.info("✅ AsyncPostgresSaver initialized - async streaming + persistence!")
-                return cls._instance
-            except Exception as e:
-                logger.warning(f"AsyncPostgresSaver failed, falling back to memory: {e}")
-        
-        # Fallback to memory saver
+
         if cls._fallback is None:
-            cls._fallback = MemorySaver()
-            if not database_url:
-                logger.warning("⚠️ Using MemorySaver - DATABASE_URL not set!")
-            else:
-                logger.warning("⚠️ Using MemorySaver - state will be lost on restart!")
-        
+            with _create_lock:
+                if cls._fallback is None:
+                    cls._fallback = MemorySaver()
         return cls._fallback
-    
+
+    @classmethod
+    def register(cls, graph):
+        """
+        Track a compiled graph so open() can move it onto the PostgreSQL saver.
+        Returns the graph, bound to the current checkpointer.
+        """
+        graph.checkpointer = cls.get_checkpointer()
+        cls._graphs.append(graph)
+        return graph
+
+    @classmethod
+    async def open(cls, pool=None):
+        """
+        Create the PostgreSQL saver inside the running loop, create its tables
+        once and rebind registered graphs to it.
+
+        Args:
+            pool: AsyncConnectionPool to use (default: the shared pool)
+        """
+        if cls._opened:
+            return cls.get_checkpointer()
+
+        async with _open_lock:
+            if cls._opened:
+                return cls.get_checkpointer()
+
+            pool = pool or get_pg_pool()
+            if pool is None or not HAS_ASYNC_PG:
+                logger.error("❌ Using MemorySaver - DATABASE_URL not set or langgraph-checkpoint-postgres missing, state will be lost on restart!")
+                return cls.get_checkpointer()
+
+            for delay in (*cls.OPEN_RETRY_DELAYS, None):
+                try:
+                    await open_pg_pool()
+                    saver = AsyncPostgresSaver(pool)
+                    await saver.setup()
+                    break
+                except Exception as e:
+                    if delay is None:
+                        # Not marked opened, so a later open() tries again
+                        logger.error(f"❌ AsyncPostgresSaver failed, using MemorySaver - state will be lost on restart: {e}")
+                        return cls.get_checkpointer()
+                    logger.warning(f"AsyncPostgresSaver setup failed, retrying in {delay}s: {e}")
+                    await asyncio.sleep(delay)
+
+            cls._instance = saver
+            for graph in cls._graphs:
+                graph.checkpointer = saver
+            cls._opened = True
+            logger.info(f"✅ AsyncPostgresSaver ready - {len(cls._graphs)} graph(s) persisting to PostgreSQL")
+            return saver
+
+    @classmethod
+    async def close(cls):
+        """Close the shared pool."""
+        if cls._instance is not None:
+            await close_pg_pool()
+        cls._opened = False
+
     @classmethod
     def reset(cls):
         """Reset the checkpointer instance (for testing)."""
-        if cls._context_manager:
-            try:
-                cls._context_manager.__exit__(None, None, None)
-            except:
-                pass
         cls._instance = None
         cls._fallback = None
-        cls._context_manager = None
+        cls._graphs = []
+        cls._opened = False
 
 
 def get_checkpointer():
@@ -85,4 +140,3 @@ def get_checkpointer():
 
 # Export for easy import
 __all__ = ["get_checkpointer", "CheckpointerFactory"]
-
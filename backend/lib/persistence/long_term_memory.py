@@ -4,15 +4,30 @@ PostgresStore - Long-Term Memory
 Cross-thread persistent memory using LangGraph PostgresStore.
 Stores user preferences, memories, and learnings that persist
 across all threads and conversations.
+
+PostgresStore's API is synchronous, so the store keeps one dedicated
+connection (serialized by the store's own lock) instead of borrowing from the
+checkpointer's async pool. open() connects and creates the tables in the
+main.py lifespan; close() releases the connection.
 """
 
-import os
+import time
+import hashlib
+import secrets
+import asyncio
+import threading
 from typing import Optional, Dict, Any, List
+import orjson
 from loguru import logger
 
+from lib.persistence.pool import DATABASE_URL
+
 # Try to import PostgresStore (requires langgraph-checkpoint-postgres)
 try:
     from langgraph.store.postgres import PostgresStore
+    from psycopg import Connection
+    from psycopg.rows import dict_row
+    from psycopg.types.json import set_json_dumps, set_json_loads
     HAS_POSTGRES_STORE = True
 except ImportError:
     HAS_POSTGRES_STORE = False
@@ -22,6 +37,40 @@ except ImportError:
 from langgraph.store.memory import InMemoryStore
 
 
+# Guards singleton creation across threads
+_lock = threading.Lock()
+
+
+def _dumps(data: Any) -> bytes:
+    """orjson-encode a JSONB payload (non-str keys and unknown types tolerated)."""
+    return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter: no false negatives, tunable false positives.
+    Defaults (2^20 bits, 7 hashes) stay under 1% false positives up to ~100k keys.
+    """
+    
+    def __init__(self, num_bits: int = 1 << 20, num_hashes: int = 7):
+        self._num_bits = num_bits
+        self._num_hashes = num_hashes
+        self._bits = bytearray(num_bits // 8)
+    
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self._num_bits for i in range(self._num_hashes))
+    
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+    
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
 class LongTermMemoryStore:
     """
     Long-term memory store for cross-thread data persistence.
@@ -30,26 +79,77 @@ class LongTermMemoryStore:
     
     _instance: Optional["LongTermMemoryStore"] = None
     
-    def __init__(self):
+    # Users with stored memories; rebuilt in the background to pick up other
+    # workers' writes, and ignored once older than NAMESPACE_FILTER_MAX_AGE
+    NAMESPACE_FILTER_TTL = 60.0
+    NAMESPACE_FILTER_MAX_AGE = 90.0
+    
+    def __init__(self, conn=None):
         self._store = None
+        self._conn = None
         self._connected = False
-        self._initialize()
+        self._namespaces: Optional[BloomFilter] = None
+        self._namespaces_loaded_at = 0.0
+        self._namespaces_lock = threading.Lock()
+        self._written_during_rebuild: Optional[set] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._initialize(conn)
     
     @classmethod
-    def get_instance(cls) -> "LongTermMemoryStore":
-        """Singleton pattern for store access."""
+    def get_instance(cls, conn=None) -> "LongTermMemoryStore":
+        """Thread-safe singleton for store access."""
         if cls._instance is None:
-            cls._instance = cls()
+            with _lock:
+                if cls._instance is None:
+                    cls._instance = cls(conn)
         return cls._instance
     
-    def _initialize(self):
-        """Initialize the store with PostgreSQL or fallback to memory."""
-        database_url = os.environ.get("DATABASE_URL")
+    @classmethod
+    async def open(cls, conn=None) -> "LongTermMemoryStore":
+        """Create the store and set up its tables (call once at startup)."""
+        # Connecting blocks, so keep it off the event loop
+        instance = await asyncio.to_thread(cls.get_instance, conn)
+        if instance._connected:
+            try:
+                await asyncio.to_thread(instance._store.setup)
+                logger.info("✅ PostgresStore tables ready for long-term memory")
+            except Exception as e:
+                logger.warning(f"PostgresStore setup failed, using InMemoryStore: {e}")
+                instance._store = InMemoryStore()
+                instance._connected = False
+                if instance._conn is not None:
+                    await asyncio.to_thread(instance._conn.close)
+                    instance._conn = None
         
-        if database_url and HAS_POSTGRES_STORE:
+        if instance._connected and instance._refresh_task is None:
+            instance._refresh_task = asyncio.create_task(instance._refresh_namespaces())
+        return instance
+    
+    @classmethod
+    async def close(cls):
+        """Stop the background namespace filter refresh and release the connection."""
+        instance = cls._instance
+        if instance is None:
+            return
+        if instance._refresh_task is not None:
+            instance._refresh_task.cancel()
+            instance._refresh_task = None
+        if instance._conn is not None:
+            await asyncio.to_thread(instance._conn.close)
+            instance._conn = None
+    
+    def _initialize(self, conn):
+        """Initialize the store on a dedicated connection or fallback to memory."""
+        if (conn is not None or DATABASE_URL) and HAS_POSTGRES_STORE:
             try:
-                self._store = PostgresStore.from_conn_string(database_url)
-                self._store.setup()
+                if conn is None:
+                    conn = self._conn = Connection.connect(
+                        DATABASE_URL, autocommit=True, prepare_threshold=0, row_factory=dict_row
+                    )
+                # orjson for JSONB on this connection only; the checkpointer keeps the stdlib
+                set_json_dumps(_dumps, context=conn)
+                set_json_loads(orjson.loads, context=conn)
+                self._store = PostgresStore(conn=conn)
                 self._connected = True
                 logger.info("✅ PostgresStore initialized for long-term memory")
             except Exception as e:
@@ -87,6 +187,7 @@ class LongTermMemoryStore:
         try:
             namespace = ("memories", user_id)
             self._store.put(namespace, key, data)
+            self._note_namespace(user_id)
             logger.debug(f"Stored memory: {user_id}/{key}")
             return True
         except Exception as e:
@@ -103,6 +204,10 @@ class LongTermMemoryStore:
             limit: Maximum results to return
         """
         try:
+            # Skip the search entirely for users that have never stored anything
+            if not self._may_have_memories(user_id):
+                return []
+            
             namespace = ("memories", user_id)
             results = self._store.search(namespace, query=query, limit=limit)
             return [item.value for item in results]
@@ -110,6 +215,51 @@ class LongTermMemoryStore:
             logger.error(f"Failed to recall memories: {e}")
             return []
     
+    def _may_have_memories(self, user_id: str) -> bool:
+        """
+        Internal: Bloom-filter check; False means the namespace is definitely empty.
+        Fails open (True) when there is no filter or it has gone stale.
+        """
+        namespaces = self._namespaces
+        if namespaces is None or time.monotonic() - self._namespaces_loaded_at > self.NAMESPACE_FILTER_MAX_AGE:
+            return True
+        return user_id in namespaces
+    
+    def _note_namespace(self, user_id: str):
+        """Internal: Add a user written by this process to the filter (and to a rebuild in progress)."""
+        with self._namespaces_lock:
+            if self._namespaces is not None:
+                self._namespaces.add(user_id)
+            if self._written_during_rebuild is not None:
+                self._written_during_rebuild.add(user_id)
+    
+    def _rebuild_namespace_filter(self):
+        """Internal: Rebuild the filter from the store (blocking; runs in a worker thread)."""
+        with self._namespaces_lock:
+            self._written_during_rebuild = set()
+        try:
+            namespaces = BloomFilter()
+            for namespace in self._store.list_namespaces(prefix=("memories",), max_depth=2, limit=1_000_000):
+                namespaces.add(namespace[1])
+        except Exception as e:
+            # Without a trustworthy filter, always search
+            logger.debug(f"Namespace filter refresh failed: {e}")
+            namespaces = None
+        
+        with self._namespaces_lock:
+            if namespaces is not None:
+                for user_id in self._written_during_rebuild:
+                    namespaces.add(user_id)
+            self._written_during_rebuild = None
+            self._namespaces = namespaces
+            self._namespaces_loaded_at = time.monotonic()
+    
+    async def _refresh_namespaces(self):
+        """Internal: Background loop rebuilding the namespace filter off the request path."""
+        while True:
+            await asyncio.to_thread(self._rebuild_namespace_filter)
+            await asyncio.sleep(self.NAMESPACE_FILTER_TTL)
+    
     def get_memory(self, user_id: str, key: str) -> Optional[Dict[str, Any]]:
         """Get a specific memory by key."""
         try:
@@ -149,8 +299,8 @@ class LongTermMemoryStore:
     
     def store_learning(self, user_id: str, category: str, learning: str) -> bool:
         """Store an agent learning for a user."""
-        import uuid
-        key = f"learning_{category}_{uuid.uuid4().hex[:8]}"
+        # Random suffix: unique across workers and restarts without shared state
+        key = f"learning_{category}_{secrets.token_hex(4)}"
         return self.remember(user_id, key, {
             "category": category,
             "learning": learning,
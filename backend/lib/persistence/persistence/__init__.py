@@ -1,10 +0,0 @@
-"""
-Persistence Module
-==================
-State persistence and checkpointing for LangGraph.
-"""
-
-from lib.persistence.checkpointer import get_checkpointer, CheckpointerFactory
-from lib.persistence.long_term_memory import get_long_term_memory, LongTermMemoryStore
-
-__all__ = ["get_checkpointer", "CheckpointerFactory", "get_long_term_memory", "LongTermMemoryStore"]
@@ -1,9 +0,0 @@
-"""
-Persistence Module
-==================
-State persistence and checkpointing for LangGraph.
-"""
-
-from lib.persistence.checkpointer import get_checkpointer, CheckpointerFactory
-
-__all__ = ["get_checkpointer", "CheckpointerFactory"]
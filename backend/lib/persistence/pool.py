@@ -0,0 +1,97 @@
+"""
+Shared PostgreSQL Pool
+======================
+One AsyncConnectionPool per process for the LangGraph checkpointer.
+
+The pool is created closed (graphs compile at import time); the FastAPI
+lifespan opens it with open_pg_pool() and closes it with close_pg_pool().
+The long-term memory store's API is synchronous, so it keeps a single
+connection of its own rather than a pool (see long_term_memory.py).
+"""
+
+import os
+import asyncio
+import threading
+from typing import Optional
+from loguru import logger
+
+from config import settings
+
+try:
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+    HAS_PG_POOL = True
+except ImportError:
+    HAS_PG_POOL = False
+    logger.warning("psycopg_pool not available")
+
+
+# Captured once at import
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+# Double-checked locks: one pool per process, opened once
+_create_lock = threading.Lock()
+_open_lock = asyncio.Lock()
+
+_pool: Optional["AsyncConnectionPool"] = None
+_opened = False
+
+_CONNECTION_KWARGS = {"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row} if HAS_PG_POOL else {}
+
+
+def get_pg_pool() -> Optional["AsyncConnectionPool"]:
+    """
+    Get the shared (possibly not yet opened) pool.
+    Returns None when DATABASE_URL is unset or psycopg_pool is missing.
+    """
+    global _pool
+
+    if _pool is not None or not (DATABASE_URL and HAS_PG_POOL):
+        return _pool
+
+    with _create_lock:
+        if _pool is None:
+            _pool = AsyncConnectionPool(
+                conninfo=DATABASE_URL,
+                min_size=settings.checkpoint_pool_min_size,
+                max_size=settings.checkpoint_pool_max_size,
+                open=False,
+                kwargs=_CONNECTION_KWARGS
+            )
+    return _pool
+
+
+async def open_pg_pool() -> bool:
+    """Open the shared pool once. Returns False if there is no pool."""
+    global _opened
+
+    pool = get_pg_pool()
+    if pool is None:
+        return False
+
+    if not _opened:
+        async with _open_lock:
+            if not _opened:
+                await pool.open()
+                _opened = True
+                logger.info("✅ PostgreSQL pool opened")
+    return True
+
+
+async def close_pg_pool():
+    """Close the shared pool."""
+    global _opened
+
+    if _pool is not None and _opened:
+        await _pool.close()
+        _opened = False
+
+
+def reset_pg_pool():
+    """Forget the shared pool (for testing)."""
+    global _pool, _opened
+    _pool = None
+    _opened = False
+
+
+__all__ = ["get_pg_pool", "open_pg_pool", "close_pg_pool", "reset_pg_pool"]
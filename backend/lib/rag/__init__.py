@@ -4,6 +4,6 @@ RAG Module for FlagPilot v7.0
 LangChain-based RAG pipeline with Qdrant + MinIO.
 """
 
-from lib.rag.pipeline import RAGPipeline, get_rag_pipeline
+from lib.rag.pipeline import RAGPipeline, get_rag_pipeline, warm_tokenizer
 
-__all__ = ["RAGPipeline", "get_rag_pipeline"]
+__all__ = ["RAGPipeline", "get_rag_pipeline", "warm_tokenizer"]
@@ -4,9 +4,16 @@ RAG Pipeline for FlagPilot v7.0
 Document ingestion, chunking, embedding, and retrieval using LangChain + Qdrant.
 """
 
-from typing import List, Optional, Dict, Any, BinaryIO
+from typing import List, Optional, Dict, Any, BinaryIO, Tuple, Iterator
+from functools import lru_cache
 from io import BytesIO
+from array import array
+import asyncio
+import codecs
+import hashlib
 import uuid
+import tiktoken
+from cachetools import TTLCache
 from loguru import logger
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
@@ -16,6 +23,49 @@ from lib.storage import get_minio_storage
 from config import settings
 
 
+# Joins documents in get_context_for_query
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """
+    Get (and cache) the tokenizer for a model, defaulting to cl100k_base.
+    None if its BPE file can't be loaded (tiktoken downloads it on first use).
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, estimating tokens as chars/4: {e}")
+        return None
+
+
+def _count_tokens(enc: Optional[tiktoken.Encoding], text: str) -> int:
+    """Token count for text, or the chars/4 estimate without a tokenizer"""
+    if enc is None:
+        return len(text) // 4
+    return len(enc.encode(text))
+
+
+async def warm_tokenizer():
+    """Load the context tokenizer at startup, off the event loop"""
+    await asyncio.to_thread(_get_encoding, settings.openrouter_model)
+
+
+@lru_cache(maxsize=8)
+def _get_text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Get (and cache) a text splitter; its separator regexes are built once"""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+
+
 class RAGPipeline:
     """
     Production RAG Pipeline:
@@ -26,6 +76,20 @@ class RAGPipeline:
     5. Retrieve relevant chunks for queries
     """
     
+    # Token counts per (chunk_id, length), shared across pipeline instances
+    _token_count_cache: Dict[Tuple[str, int], int] = {}
+    _TOKEN_CACHE_MAX = 10000
+    
+    # Retrieval caches, shared across pipeline instances:
+    # exact (query, k, filter) and semantic (quantized query embedding, k, filter)
+    _q_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+    _semantic_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+    _inflight: Dict[tuple, asyncio.Future] = {}
+    
+    # Chunks per embedding request, and embedding requests in flight per ingest
+    EMBED_BATCH_SIZE = 96
+    EMBED_CONCURRENCY = 4
+    
     def __init__(
         self,
         chunk_size: int = 1000,
@@ -34,12 +98,7 @@ class RAGPipeline:
         self.qdrant = get_qdrant_store()
         self.minio = get_minio_storage()
         
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""],
-        )
+        self.text_splitter = _get_text_splitter(chunk_size, chunk_overlap)
     
     async def ingest_text(
         self,
@@ -61,8 +120,8 @@ class RAGPipeline:
             Dict with chunk_count and doc_ids
         """
         try:
-            # Split text into chunks
-            chunks = self.text_splitter.split_text(text)
+            # Split text into chunks (CPU-bound, keep it off the event loop)
+            chunks = await asyncio.to_thread(self.text_splitter.split_text, text)
             
             # Create documents with metadata
             base_metadata = {
@@ -72,20 +131,9 @@ class RAGPipeline:
                 **(metadata or {}),
             }
             
-            documents = [
-                Document(
-                    page_content=chunk,
-                    metadata={
-                        **base_metadata,
-                        "chunk_index": i,
-                        "chunk_id": f"{source}_{i}",
-                    },
-                )
-                for i, chunk in enumerate(chunks)
-            ]
-            
             # Add to Qdrant
-            doc_ids = await self.qdrant.add_documents(documents)
+            doc_ids = await self._add_in_batches(chunks, source, base_metadata)
+            self.clear_cache()
             
             logger.info(f"Ingested {len(chunks)} chunks from '{source}'")
             
@@ -100,6 +148,54 @@ class RAGPipeline:
             logger.error(f"Text ingestion failed: {e}")
             return {"success": False, "error": str(e)}
     
+    async def _add_in_batches(
+        self,
+        chunks: List[str],
+        source: str,
+        base_metadata: Dict[str, Any],
+    ) -> List[str]:
+        """
+        Embed and store chunks in fixed-size batches, a few requests at a time.
+        Documents are only built once their batch holds a slot. If any batch
+        fails, the batches that did land are deleted and the error re-raised.
+        """
+        semaphore = asyncio.Semaphore(self.EMBED_CONCURRENCY)
+        
+        async def _add(start: int) -> List[str]:
+            async with semaphore:
+                batch = chunks[start:start + self.EMBED_BATCH_SIZE]
+                return await self.qdrant.add_documents(
+                    list(self._chunk_documents(batch, source, base_metadata, start))
+                )
+        
+        results = await asyncio.gather(
+            *(_add(start) for start in range(0, len(chunks), self.EMBED_BATCH_SIZE)),
+            return_exceptions=True,
+        )
+        
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            added = [i for r in results if not isinstance(r, BaseException) for i in r]
+            if added:
+                await self.qdrant.delete_documents(added)
+            raise errors[0]
+        
+        return [i for r in results for i in r]
+    
+    @staticmethod
+    def _chunk_documents(
+        chunks: List[str],
+        source: str,
+        base_metadata: Dict[str, Any],
+        start: int = 0,
+    ) -> Iterator[Document]:
+        """Lazily build one Document per chunk, numbering chunks from start"""
+        for i, chunk in enumerate(chunks, start):
+            yield Document(
+                page_content=chunk,
+                metadata=dict(base_metadata, chunk_index=i, chunk_id=f"{source}_{i}"),
+            )
+    
     async def ingest_file(
         self,
         file_data: BinaryIO,
@@ -111,44 +207,52 @@ class RAGPipeline:
         """
         Ingest a file into the RAG system.
         
-        1. Upload to MinIO for storage
-        2. Extract text (basic - extend for PDF/DOCX)
-        3. Chunk and embed into Qdrant
+        1. Extract text (basic - extend for PDF/DOCX)
+        2. Upload to MinIO and chunk/embed into Qdrant concurrently
         """
         try:
-            # Upload to MinIO first
-            upload_result = self.minio.upload_file(
-                file_data=file_data,
-                file_name=file_name,
-                content_type=content_type,
-                user_id=user_id,
-                metadata=metadata,
-            )
-            
-            # Reset file pointer and read content
-            file_data.seek(0)
-            content = file_data.read()
+            # Decode text (basic - extend for binary formats such as PDF);
+            # undecodable bytes become U+FFFD instead of forcing a re-read
+            text = self._read_text(file_data, "utf-8")
             
-            # Decode text (basic - extend for binary formats)
-            try:
-                text = content.decode("utf-8")
-            except UnicodeDecodeError:
-                # For binary files, note: extend this for PDF parsing
-                text = content.decode("latin-1")
-            
-            # Ingest the text
-            ingest_result = await self.ingest_text(
-                text=text,
-                source=upload_result["object_name"],
-                user_id=user_id,
-                metadata={
-                    "original_name": file_name,
-                    "content_type": content_type,
-                    "minio_object": upload_result["object_name"],
-                    **(metadata or {}),
-                },
+            # Object name is known up front, so MinIO upload and Qdrant
+            # ingestion run concurrently
+            object_name = self.minio.make_object_name(file_name, user_id)
+            upload_result, ingest_result = await asyncio.gather(
+                self.minio.aupload_file(
+                    file_data=file_data,
+                    file_name=file_name,
+                    content_type=content_type,
+                    user_id=user_id,
+                    metadata=metadata,
+                    object_name=object_name,
+                ),
+                self.ingest_text(
+                    text=text,
+                    source=object_name,
+                    user_id=user_id,
+                    metadata={
+                        "original_name": file_name,
+                        "content_type": content_type,
+                        "minio_object": object_name,
+                        **(metadata or {}),
+                    },
+                ),
+                return_exceptions=True,
             )
             
+            # Don't leave searchable chunks pointing at a file that was never stored
+            if isinstance(upload_result, BaseException):
+                if isinstance(ingest_result, dict) and ingest_result.get("doc_ids"):
+                    await self.qdrant.delete_documents(ingest_result["doc_ids"])
+                raise upload_result
+            # ...nor a stored file that has no searchable chunks
+            if isinstance(ingest_result, BaseException) or not ingest_result.get("success"):
+                await self.minio.adelete_file(object_name)
+                if isinstance(ingest_result, BaseException):
+                    raise ingest_result
+                return ingest_result
+            
             return {
                 **ingest_result,
                 "file": upload_result,
@@ -158,6 +262,17 @@ class RAGPipeline:
             logger.error(f"File ingestion failed: {e}")
             return {"success": False, "error": str(e)}
     
+    @staticmethod
+    def _read_text(file_data: BinaryIO, encoding: str, chunk_size: int = 64 * 1024) -> str:
+        """Decode a file in fixed-size chunks instead of one full read()"""
+        file_data.seek(0)
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        parts = []
+        while chunk := file_data.read(chunk_size):
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
+    
     async def retrieve(
         self,
         query: str,
@@ -178,15 +293,55 @@ class RAGPipeline:
             List of relevant documents
         """
         # Build filter
-        filter_dict = filter_metadata or {}
+        filter_dict = dict(filter_metadata or {})
         if user_id:
             filter_dict["user_id"] = user_id
+        filter_key = repr(sorted(filter_dict.items()))
         
-        return await self.qdrant.similarity_search(
-            query=query,
-            k=k,
-            filter=filter_dict if filter_dict else None,
-        )
+        key = (query, k, filter_key)
+        cached = self._q_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
+        # Concurrent misses for the same query share one embedding + search
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._retrieve_uncached(query, k, filter_dict, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return list(await asyncio.shield(task))
+    
+    async def _retrieve_uncached(
+        self,
+        query: str,
+        k: int,
+        filter_dict: Dict[str, Any],
+        key: tuple,
+    ) -> List[Document]:
+        """Embed the query and search, going through the semantic cache"""
+        filter_key = key[2]
+        
+        # Semantic tier: near-identical queries share a quantized embedding
+        try:
+            embedding = await self.qdrant.embeddings.aembed_query(query)
+        except Exception as e:
+            logger.error(f"Query embedding failed: {e}")
+            return []
+        semantic_key = (self._quantize(embedding), k, filter_key)
+        cached = self._semantic_cache.get(semantic_key)
+        if cached is None:
+            cached = await self.qdrant.similarity_search_by_vector(
+                embedding=embedding,
+                k=k,
+                filter=filter_dict if filter_dict else None,
+            )
+            # Empty results may be a transient failure; don't pin them
+            if not cached:
+                return []
+            self._semantic_cache[semantic_key] = cached
+        
+        self._q_cache[key] = cached
+        return cached
     
     async def retrieve_with_scores(
         self,
@@ -195,40 +350,85 @@ class RAGPipeline:
         min_score: float = 0.0,
     ) -> List[tuple[Document, float]]:
         """Retrieve with relevance scores, optionally filtering by minimum score"""
-        results = await self.qdrant.similarity_search_with_score(
-            query=query,
-            k=k,
-        )
+        key = ("scored", query, k)
+        results = self._q_cache.get(key)
+        if results is None:
+            results = await self.qdrant.similarity_search_with_score(
+                query=query,
+                k=k,
+            )
+            if results:
+                self._q_cache[key] = results
         
         # Filter by minimum score
         if min_score > 0:
             results = [(doc, score) for doc, score in results if score >= min_score]
         
-        return results
+        return list(results)
+    
+    @staticmethod
+    def _quantize(embedding: List[float]) -> str:
+        """Hash an embedding quantized to int8"""
+        quantized = array("b", (max(-127, min(127, round(v * 127))) for v in embedding))
+        return hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+    
+    @classmethod
+    def clear_cache(cls):
+        """Drop cached retrieval results (called after ingestion)"""
+        cls._q_cache.clear()
+        cls._semantic_cache.clear()
     
     def get_context_for_query(
         self,
         documents: List[Document],
         max_tokens: int = 4000,
     ) -> str:
-        """Format retrieved documents as context string for LLM"""
+        """
+        Format retrieved documents as context string for LLM.
+        The budget covers source headers and separators, not just content;
+        the first document that would overflow it is cut to the leftover
+        budget (if more than 64 tokens remain) and assembly stops there.
+        """
         context_parts = []
-        current_length = 0
+        enc = _get_encoding(settings.openrouter_model)
+        token_cache = self._token_count_cache
+        separator_tokens = _count_tokens(enc, CONTEXT_SEPARATOR)
+        used = 0
         
         for doc in documents:
             content = doc.page_content
-            source = doc.metadata.get("source", "unknown")
+            header = f"[Source: {doc.metadata.get('source', 'unknown')}]\n"
             
-            # Rough token estimate (4 chars per token)
-            estimated_tokens = len(content) // 4
+            # Re-retrieved chunks reuse their cached token count
+            chunk_id = doc.metadata.get("chunk_id")
+            key = (chunk_id, len(content))
+            tokens = token_cache.get(key) if chunk_id else None
+            if tokens is None:
+                tokens = _count_tokens(enc, content)
+                if chunk_id:
+                    if len(token_cache) >= self._TOKEN_CACHE_MAX:
+                        token_cache.clear()
+                    token_cache[key] = tokens
             
-            if current_length + estimated_tokens > max_tokens:
+            overhead = _count_tokens(enc, header) + (separator_tokens if context_parts else 0)
+            if used + overhead + tokens > max_tokens:
+                # Fill a worthwhile leftover budget with the head of this document
+                remaining = max_tokens - used - overhead
+                if remaining > 64:
+                    context_parts.append(header + self._truncate_tokens(enc, content, remaining))
                 break
             
-            context_parts.append(f"[Source: {source}]\n{content}")
-            current_length += estimated_tokens
+            context_parts.append(header + content)
+            used += overhead + tokens
         
-        return "\n\n---\n\n".join(context_parts)
+        return CONTEXT_SEPARATOR.join(context_parts)
+    
+    @staticmethod
+    def _truncate_tokens(enc: Optional[tiktoken.Encoding], text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens (chars/4 estimate without a tokenizer)"""
+        if enc is None:
+            return text[:max_tokens * 4]
+        return enc.decode(enc.encode(text)[:max_tokens])
 
 
 # Factory function
@@ -5,11 +5,151 @@ Real rate limiting with tier-based limits.
 NO MOCKS. Production-ready implementation.
 """
 
+import time
+import asyncio
 from lib.redis_client import get_redis
 from lib.auth.database import DatabasePool
 from fastapi import HTTPException
 from loguru import logger
-from typing import Optional
+from typing import Optional, Tuple
+from cachetools import TTLCache
+
+
+# INCR + first-hit PEXPIRE + PTTL in one atomic round-trip
+_INCR_WINDOW_LUA = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+return {current, redis.call('PTTL', KEYS[1])}
+"""
+_incr_script = None
+
+
+def _get_incr_script(redis):
+    """Get the counter script bound to the current client (EVALSHA, EVAL on NOSCRIPT)."""
+    global _incr_script
+    if _incr_script is None or _incr_script.registered_client is not redis:
+        _incr_script = redis.register_script(_INCR_WINDOW_LUA)
+    return _incr_script
+
+
+async def load_scripts():
+    """
+    Preload rate-limit scripts into Redis so the first request per worker
+    is a plain EVALSHA instead of a NOSCRIPT miss and retry.
+    """
+    redis = get_redis()
+    if not redis:
+        return
+    
+    try:
+        for script in (_get_incr_script(redis), _get_sliding_script(redis)):
+            await redis.script_load(script.script)
+        logger.info("Rate-limit scripts loaded")
+    except Exception as e:
+        logger.warning(f"Rate-limit script preload failed: {e}")
+
+
+# Approximate sliding window (two counters per key): the previous window's
+# count is weighted by how much of it still overlaps the rolling window.
+# Denied requests are not counted. With an empty limit, the limit is resolved
+# from the cached tier in KEYS[2] against (tier, limit) pairs in ARGV[4:],
+# the first pair being the default; {-1} means the tier is not cached yet.
+_SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local tier = ''
+if not limit then
+    tier = redis.call('GET', KEYS[2])
+    if not tier then
+        return {-1, 0, 0, 0, ''}
+    end
+    for i = 4, #ARGV, 2 do
+        if ARGV[i] == tier then
+            limit = tonumber(ARGV[i + 1])
+        end
+    end
+    limit = limit or tonumber(ARGV[5])
+end
+local epoch = math.floor(now / window)
+local state = redis.call('HMGET', KEYS[1], 'epoch', 'curr', 'prev')
+local last = tonumber(state[1]) or epoch
+local curr = tonumber(state[2]) or 0
+local prev = tonumber(state[3]) or 0
+if last ~= epoch then
+    if last == epoch - 1 then prev = curr else prev = 0 end
+    curr = 0
+end
+local remaining = window - now % window
+local estimated = prev * remaining / window + curr
+local allowed = 0
+local reset = remaining
+if estimated < limit then
+    curr = curr + 1
+    estimated = estimated + 1
+    allowed = 1
+elseif curr < limit and prev > 0 then
+    reset = math.min(reset, math.floor((estimated - limit) * window / prev) + 1)
+end
+redis.call('HSET', KEYS[1], 'epoch', epoch, 'curr', curr, 'prev', prev)
+redis.call('PEXPIRE', KEYS[1], window * 2)
+return {allowed, math.ceil(estimated), reset, limit, tier}
+"""
+_sliding_script = None
+
+
+def _get_sliding_script(redis):
+    """Get the sliding-window script bound to the current client."""
+    global _sliding_script
+    if _sliding_script is None or _sliding_script.registered_client is not redis:
+        _sliding_script = redis.register_script(_SLIDING_WINDOW_LUA)
+    return _sliding_script
+
+
+async def _sliding_window(
+    redis,
+    key: str,
+    window: int,
+    limit: Optional[int] = None,
+    tier_key: Optional[str] = None,
+) -> Optional[Tuple[bool, int, int, int, str]]:
+    """
+    Record a request in a rolling window.
+    Without a limit, it is resolved in Redis from the tier cached at tier_key.
+    Returns (allowed, estimated requests in window, seconds until one more is
+    allowed, limit, tier), or None if the tier is not cached (nothing recorded).
+    """
+    if limit is None:
+        keys, args = [key, tier_key], ["", *_TIER_LIMIT_ARGS]
+    else:
+        keys, args = [key], [limit]
+    allowed, count, reset_ms, limit, tier = await _get_sliding_script(redis)(
+        keys=keys, args=[int(time.time() * 1000), window * 1000, *args]
+    )
+    if int(allowed) < 0:
+        return None
+    return bool(allowed), int(count), max(0, -(-int(reset_ms) // 1000)), int(limit), tier.decode()
+
+
+def _estimate_window(state: list, window: int) -> int:
+    """Estimate the rolling count from a [epoch, curr, prev] hash read."""
+    last, curr, prev = (int(v) if v else 0 for v in state)
+    window_ms = window * 1000
+    now_ms = int(time.time() * 1000)
+    epoch = now_ms // window_ms
+    if last == epoch - 1:
+        curr, prev = 0, curr
+    elif last != epoch:
+        curr, prev = 0, 0
+    return curr - (-prev * (window_ms - now_ms % window_ms) // window_ms)
+
+
+async def _incr_window(redis, key: str, window: int) -> Tuple[int, int]:
+    """Increment a fixed-window counter. Returns (count, seconds until reset)."""
+    current, pttl = await _get_incr_script(redis)(keys=[key], args=[window * 1000])
+    return int(current), max(0, -(-int(pttl) // 1000))
 
 
 # Tier-based rate limits (requests per hour)
@@ -20,6 +160,47 @@ TIER_RATE_LIMITS = {
     "enterprise": {"requests_per_hour": 2000, "burst_limit": 100},
 }
 
+# Flattened (tier, hourly limit) pairs for the sliding-window script; "free" first
+_TIER_LIMIT_ARGS = [
+    value
+    for tier, config in TIER_RATE_LIMITS.items()
+    for value in (tier, config["requests_per_hour"])
+]
+
+# Tiers are shared across workers in Redis, and looked up in Postgres on a miss.
+# Subscriptions change outside this service, so a new tier applies once the
+# cached one expires (at most TIER_CACHE_TTL plus the in-process TTL below)
+TIER_CACHE_TTL = 600
+
+
+def _tier_key(user_id: str) -> str:
+    return f"tier:{user_id}"
+
+
+# Per-process caches: recent denials short-circuit Redis until they reset,
+# and tiers avoid a database query on every request
+_deny_cache: TTLCache = TTLCache(maxsize=100_000, ttl=60)
+_tier_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+
+
+def _check_denied(cache_key: tuple) -> Optional[Tuple[int, int]]:
+    """(seconds left, limit) for a cached denial, or None if the key is not denied."""
+    entry = _deny_cache.get(cache_key)
+    if entry is None:
+        return None
+    deny_until, limit = entry
+    left = deny_until - time.monotonic()
+    if left <= 0:
+        _deny_cache.pop(cache_key, None)
+        return None
+    return -(-int(left * 1000) // 1000), limit
+
+
+def _remember_denied(cache_key: tuple, reset_in: int, limit: int):
+    """Cache a denial locally until Redis would allow the key again."""
+    if reset_in > 0:
+        _deny_cache[cache_key] = (time.monotonic() + reset_in, limit)
+
 
 class RateLimiter:
     """
@@ -31,17 +212,35 @@ class RateLimiter:
     
     @staticmethod
     async def get_user_tier(user_id: str) -> str:
-        """Get user's subscription tier from database."""
+        """
+        Get user's subscription tier.
+        Checks the in-process cache, then Redis, then the database.
+        """
         if user_id == "anonymous":
             return "free"
         
+        tier = _tier_cache.get(user_id)
+        if tier is not None:
+            return tier
+        
+        redis = get_redis()
         try:
+            if redis:
+                cached = await redis.get(_tier_key(user_id))
+                if cached:
+                    tier = _tier_cache[user_id] = cached.decode()
+                    return tier
+            
             pool = await DatabasePool.get_pool()
             row = await pool.fetchrow(
                 'SELECT subscription_tier FROM "user" WHERE id = $1',
                 user_id
             )
-            return row["subscription_tier"] if row else "free"
+            tier = row["subscription_tier"] if row else "free"
+            _tier_cache[user_id] = tier
+            if redis:
+                await redis.setex(_tier_key(user_id), TIER_CACHE_TTL, tier)
+            return tier
         except Exception as e:
             logger.error(f"Error getting user tier: {e}")
             return "free"
@@ -67,24 +266,45 @@ class RateLimiter:
             # Fail open if Redis is down
             return {"allowed": True, "remaining": 999, "limit": 999}
         
+        deny_key = (user_id, "hourly", limit, window)
+        denied = _check_denied(deny_key)
+        if denied is not None:
+            reset_in, denied_limit = denied
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "error": "Rate limit exceeded",
+                    "limit": denied_limit,
+                    "reset_in_seconds": reset_in,
+                    "upgrade_url": "/pricing"
+                }
+            )
+        
         try:
-            # Get tier-based limit
-            if limit is None:
-                tier = await RateLimiter.get_user_tier(user_id)
-                tier_config = TIER_RATE_LIMITS.get(tier, TIER_RATE_LIMITS["free"])
-                limit = tier_config["requests_per_hour"]
-            
-            key = f"rate_limit:{user_id}:hourly"
-            current = await redis.incr(key)
+            key = f"rate_limit:{user_id}:sliding"
             
-            if current == 1:
-                await redis.expire(key, window)
+            # Get tier-based limit; when only Redis knows the tier, it is
+            # resolved inside the rate-limit script in the same round trip
+            result = None
+            if limit is None:
+                tier = "free" if user_id == "anonymous" else _tier_cache.get(user_id)
+                if tier is None:
+                    result = await _sliding_window(redis, key, window, tier_key=_tier_key(user_id))
+                    if result is not None:
+                        _tier_cache[user_id] = result[4]
+                    else:
+                        tier = await RateLimiter.get_user_tier(user_id)
+                if result is None:
+                    limit = TIER_RATE_LIMITS.get(tier, TIER_RATE_LIMITS["free"])["requests_per_hour"]
             
-            ttl = await redis.ttl(key)
+            if result is None:
+                result = await _sliding_window(redis, key, window, limit)
+            allowed, current, ttl, limit, _ = result
             remaining = max(0, limit - current)
             
-            if current > limit:
+            if not allowed:
                 logger.warning(f"Rate limit exceeded for {user_id}: {current}/{limit}")
+                _remember_denied(deny_key, ttl, limit)
                 raise HTTPException(
                     status_code=429, 
                     detail={
@@ -118,19 +338,26 @@ class RateLimiter:
         if not redis:
             return True
         
+        deny_key = (user_id, "burst")
+        if _check_denied(deny_key) is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Please slow down."
+            )
+        
         try:
-            tier = await RateLimiter.get_user_tier(user_id)
+            # The counter doesn't depend on the tier, so look both up at once
+            key = f"rate_limit:{user_id}:burst"
+            tier, (current, ttl) = await asyncio.gather(
+                RateLimiter.get_user_tier(user_id),
+                _incr_window(redis, key, 60),  # 1 minute window
+            )
             tier_config = TIER_RATE_LIMITS.get(tier, TIER_RATE_LIMITS["free"])
             burst_limit = tier_config["burst_limit"]
             
-            key = f"rate_limit:{user_id}:burst"
-            current = await redis.incr(key)
-            
-            if current == 1:
-                await redis.expire(key, 60)  # 1 minute window
-            
             if current > burst_limit:
                 logger.warning(f"Burst limit exceeded for {user_id}: {current}/{burst_limit}")
+                _remember_denied(deny_key, ttl, burst_limit)
                 raise HTTPException(
                     status_code=429,
                     detail="Too many requests. Please slow down."
@@ -152,13 +379,19 @@ class RateLimiter:
             return {"hourly_used": 0, "daily_used": 0}
         
         try:
-            hourly_key = f"rate_limit:{user_id}:hourly"
-            daily_key = f"rate_limit:{user_id}:daily"
+            hourly_key = f"rate_limit:{user_id}:sliding"
             
-            hourly = await redis.get(hourly_key)
-            daily = await redis.get(daily_key)
+            # Window counters and the Redis-cached tier in one round trip
+            pipe = redis.pipeline(transaction=False)
+            pipe.hmget(hourly_key, "epoch", "curr", "prev")
+            pipe.get(_tier_key(user_id))
+            state, cached_tier = await pipe.execute()
+            hourly = _estimate_window(state, 3600)
             
-            tier = await RateLimiter.get_user_tier(user_id)
+            if cached_tier and user_id != "anonymous":
+                tier = _tier_cache[user_id] = cached_tier.decode()
+            else:
+                tier = await RateLimiter.get_user_tier(user_id)
             tier_config = TIER_RATE_LIMITS.get(tier, TIER_RATE_LIMITS["free"])
             
             return {
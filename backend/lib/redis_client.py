@@ -3,21 +3,41 @@ Redis Client for Caching
 """
 
 import os
-from typing import Optional
+from typing import Any, Optional, Dict
+import msgpack
+import zstandard as zstd
 from loguru import logger
 
+# Replies stay bytes; callers decode only what they need as text
 _redis_client = None
+_redis_pool = None
+
+# Cache payloads: msgpack, zstd-compressed above the threshold.
+# The first byte tags the encoding.
+COMPRESS_THRESHOLD = 1024
+_RAW = b"R"
+_ZSTD = b"Z"
+_compressor = zstd.ZstdCompressor(level=3)
+_decompressor = zstd.ZstdDecompressor()
 
 
 async def init_redis():
     """Initialize Redis connection"""
-    global _redis_client
+    global _redis_client, _redis_pool
     
     redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+    pool_size = int(os.getenv("REDIS_POOL_SIZE", "100"))
     
     try:
         import redis.asyncio as redis
-        _redis_client = redis.from_url(redis_url, decode_responses=True)
+        # Bounded pool: concurrent requests wait for a free connection
+        # instead of each opening its own socket
+        _redis_pool = redis.BlockingConnectionPool.from_url(
+            redis_url,
+            max_connections=pool_size,
+            health_check_interval=30,
+        )
+        _redis_client = redis.Redis(connection_pool=_redis_pool)
         await _redis_client.ping()
         logger.info("Redis connected")
     except ImportError:
@@ -26,29 +46,86 @@ async def init_redis():
     except Exception as e:
         logger.warning(f"Redis not available: {e}")
         _redis_client = None
+        if _redis_pool:
+            await _redis_pool.disconnect()
+        _redis_pool = None
 
 
 async def close_redis():
-    """Close Redis connection"""
-    global _redis_client
+    """Close Redis connection and its pool"""
+    global _redis_client, _redis_pool
     if _redis_client:
         await _redis_client.close()
+        _redis_client = None
+    if _redis_pool:
+        await _redis_pool.disconnect()
+        _redis_pool = None
         logger.info("Redis connection closed")
 
 
+def get_redis_pool_stats() -> Optional[Dict[str, int]]:
+    """
+    Connection counts for the Redis pool, or None if not connected.
+    in_use/idle come from redis-py internals that differ between versions,
+    so they are only present when this version exposes them.
+    """
+    if not _redis_pool:
+        return None
+    stats = {"max": _redis_pool.max_connections}
+    for name, attr in (("in_use", "_in_use_connections"), ("idle", "_available_connections")):
+        try:
+            stats[name] = len(getattr(_redis_pool, attr))
+        except (AttributeError, TypeError):
+            pass
+    return stats
+
+
 def get_redis():
     """Get Redis client"""
     return _redis_client
 
 
-async def cache_get(key: str) -> Optional[str]:
-    """Get value from cache"""
+def _encode(value: Any) -> bytes:
+    """msgpack a cache value, compressing it past COMPRESS_THRESHOLD"""
+    data = msgpack.packb(value)
+    if len(data) > COMPRESS_THRESHOLD:
+        return _ZSTD + _compressor.compress(data)
+    return _RAW + data
+
+
+def _decode(data: bytes) -> Any:
+    """Reverse _encode"""
+    tag, body = data[:1], data[1:]
+    if tag == _ZSTD:
+        body = _decompressor.decompress(body)
+    return msgpack.unpackb(body)
+
+
+async def cache_get(key: str) -> Any:
+    """Get value from cache (any msgpack-serializable object)"""
+    if _redis_client:
+        data = await _redis_client.get(key)
+        if data:
+            return _decode(data)
+    return None
+
+
+async def cache_set(key: str, value: Any, expire: int = 3600):
+    """Set value in cache (any msgpack-serializable object)"""
+    if _redis_client:
+        await _redis_client.set(key, _encode(value), ex=expire)
+
+
+async def cache_get_str(key: str) -> Optional[str]:
+    """Get a plain string value from cache"""
     if _redis_client:
-        return await _redis_client.get(key)
+        data = await _redis_client.get(key)
+        if data is not None:
+            return data.decode()
     return None
 
 
-async def cache_set(key: str, value: str, expire: int = 3600):
-    """Set value in cache"""
+async def cache_set_str(key: str, value: str, expire: int = 3600):
+    """Set a plain string value in cache"""
     if _redis_client:
         await _redis_client.set(key, value, ex=expire)
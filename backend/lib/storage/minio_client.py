@@ -4,10 +4,15 @@ MinIO Storage Client for FlagPilot v7.0
 S3-compatible file storage for contracts, documents, and uploads.
 """
 
-from typing import Optional, BinaryIO, Dict, Any
+from typing import Optional, BinaryIO, Dict, Any, Iterator
 from io import BytesIO
-import uuid
-from datetime import datetime, timedelta
+import asyncio
+import itertools
+import os
+import secrets
+import time
+import threading
+from datetime import timedelta
 from loguru import logger
 from minio import Minio
 from minio.error import S3Error
@@ -15,21 +20,43 @@ from minio.error import S3Error
 from config import settings
 
 
+# Object names: a per-second timestamp (formatted once per second), a random
+# per-process tag so workers never collide, and a per-process counter
+_ts_cache = [0, ""]
+_process_tag = secrets.token_hex(4)
+_counter = itertools.count()
+
+
+# Guards singleton creation across threads
+_lock = threading.Lock()
+
+# Buckets known to exist in this process
+_verified_buckets: set = set()
+SKIP_BUCKET_CHECK = os.environ.get("FLAGPILOT_SKIP_BUCKET_CHECK", "0") == "1"
+
+
 class MinIOStorage:
     """Production MinIO client for file operations"""
     
     _instance: Optional["MinIOStorage"] = None
     _client: Optional[Minio] = None
     
+    # Multipart part size for streams of unknown length
+    STREAM_PART_SIZE = 10 * 1024 * 1024
+    
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            with _lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
         return cls._instance
     
     def __init__(self):
         if self._client is not None:
             return
-        self._initialize()
+        with _lock:
+            if self._client is None:
+                self._initialize()
     
     def _initialize(self):
         """Initialize MinIO client and ensure bucket exists"""
@@ -49,14 +76,22 @@ class MinIOStorage:
             logger.error(f"MinIO initialization failed: {e}")
             raise
     
-    def _ensure_bucket(self):
-        """Create bucket if it doesn't exist"""
+    def _ensure_bucket(self, force: bool = False):
+        """
+        Create bucket if it doesn't exist.
+        Skipped once verified in this process, or with FLAGPILOT_SKIP_BUCKET_CHECK=1
+        when buckets are provisioned at deploy time (python -m lib.storage.minio_client).
+        """
+        if not force and (settings.minio_bucket in _verified_buckets or SKIP_BUCKET_CHECK):
+            return
+        
         try:
             if not self._client.bucket_exists(settings.minio_bucket):
                 self._client.make_bucket(settings.minio_bucket)
                 logger.info(f"Created MinIO bucket: {settings.minio_bucket}")
             else:
                 logger.debug(f"MinIO bucket '{settings.minio_bucket}' exists")
+            _verified_buckets.add(settings.minio_bucket)
         except S3Error as e:
             logger.error(f"Failed to ensure bucket: {e}")
             raise
@@ -66,6 +101,20 @@ class MinIOStorage:
         """Get raw MinIO client"""
         return self._client
     
+    @staticmethod
+    def make_object_name(file_name: str, user_id: Optional[str] = None) -> str:
+        """Generate a unique object name for an upload"""
+        ext = file_name.rsplit(".", 1)[-1] if "." in file_name else ""
+        now = int(time.time())
+        if now != _ts_cache[0]:
+            _ts_cache[:] = [now, time.strftime("%Y%m%d_%H%M%S", time.localtime(now))]
+        timestamp = _ts_cache[1]
+        unique_id = f"{_process_tag}{next(_counter) & 0xFFFF:04x}"
+        
+        if user_id:
+            return f"{user_id}/{timestamp}_{unique_id}.{ext}"
+        return f"uploads/{timestamp}_{unique_id}.{ext}"
+    
     def upload_file(
         self,
         file_data: BinaryIO,
@@ -73,6 +122,8 @@ class MinIOStorage:
         content_type: str = "application/octet-stream",
         metadata: Optional[Dict[str, str]] = None,
         user_id: Optional[str] = None,
+        object_name: Optional[str] = None,
+        length: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Upload a file to MinIO.
@@ -83,32 +134,30 @@ class MinIOStorage:
             content_type: MIME type
             metadata: Optional metadata dict
             user_id: Optional user ID for organizing
+            object_name: Precomputed object name (see make_object_name)
+            length: Size in bytes if known; otherwise probed for seekable
+                streams, or streamed as multipart when unknown (size None)
             
         Returns:
             Dict with object_name, bucket, etag, size, url
         """
         try:
-            # Generate unique object name
-            ext = file_name.rsplit(".", 1)[-1] if "." in file_name else ""
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            unique_id = uuid.uuid4().hex[:8]
+            object_name = object_name or self.make_object_name(file_name, user_id)
             
-            if user_id:
-                object_name = f"{user_id}/{timestamp}_{unique_id}.{ext}"
-            else:
-                object_name = f"uploads/{timestamp}_{unique_id}.{ext}"
+            file_size = length
+            if file_data.seekable():
+                # Upload from the start; probe the size only if not given
+                if file_size is None:
+                    file_size = file_data.seek(0, 2)
+                file_data.seek(0)
             
-            # Get file size
-            file_data.seek(0, 2)
-            file_size = file_data.tell()
-            file_data.seek(0)
-            
-            # Upload
+            # Upload (unknown length streams in STREAM_PART_SIZE parts)
             result = self._client.put_object(
                 bucket_name=settings.minio_bucket,
                 object_name=object_name,
                 data=file_data,
-                length=file_size,
+                length=-1 if file_size is None else file_size,
+                part_size=self.STREAM_PART_SIZE if file_size is None else 0,
                 content_type=content_type,
                 metadata=metadata or {},
             )
@@ -143,6 +192,7 @@ class MinIOStorage:
             content_type=content_type,
             metadata=metadata,
             user_id=user_id,
+            length=len(data),
         )
     
     def download_file(self, object_name: str) -> bytes:
@@ -191,29 +241,36 @@ class MinIOStorage:
             logger.error(f"Delete failed: {e}")
             return False
     
-    def list_files(
+    def iter_files(
         self,
         prefix: str = "",
         recursive: bool = True,
-    ) -> list:
-        """List files in bucket"""
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Lazily list files in bucket, page by page, stopping after limit"""
         try:
             objects = self._client.list_objects(
                 bucket_name=settings.minio_bucket,
                 prefix=prefix,
                 recursive=recursive,
             )
-            return [
-                {
+            for obj in itertools.islice(objects, limit):
+                yield {
                     "name": obj.object_name,
                     "size": obj.size,
                     "modified": obj.last_modified,
                 }
-                for obj in objects
-            ]
         except S3Error as e:
             logger.error(f"List failed: {e}")
-            return []
+    
+    def list_files(
+        self,
+        prefix: str = "",
+        recursive: bool = True,
+        limit: Optional[int] = None,
+    ) -> list:
+        """List files in bucket"""
+        return list(self.iter_files(prefix, recursive, limit))
     
     def file_exists(self, object_name: str) -> bool:
         """Check if file exists"""
@@ -225,9 +282,56 @@ class MinIOStorage:
             return True
         except S3Error:
             return False
+    
+    # =========================================
+    # ASYNC API
+    # The minio SDK is blocking; these run it in a worker thread so a slow
+    # transfer doesn't stall the event loop.
+    # =========================================
+    
+    async def aupload_file(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async upload_file"""
+        return await asyncio.to_thread(self.upload_file, *args, **kwargs)
+    
+    async def aupload_bytes(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async upload_bytes"""
+        return await asyncio.to_thread(self.upload_bytes, *args, **kwargs)
+    
+    async def adownload_file(self, object_name: str) -> bytes:
+        """Async download_file"""
+        return await asyncio.to_thread(self.download_file, object_name)
+    
+    async def aget_presigned_url(self, object_name: str, expires: int = 3600) -> str:
+        """Async get_presigned_url"""
+        return await asyncio.to_thread(self.get_presigned_url, object_name, expires)
+    
+    async def adelete_file(self, object_name: str) -> bool:
+        """Async delete_file"""
+        return await asyncio.to_thread(self.delete_file, object_name)
+    
+    async def alist_files(
+        self,
+        prefix: str = "",
+        recursive: bool = True,
+        limit: Optional[int] = None,
+    ) -> list:
+        """Async list_files"""
+        return await asyncio.to_thread(self.list_files, prefix, recursive, limit)
+    
+    async def afile_exists(self, object_name: str) -> bool:
+        """Async file_exists"""
+        return await asyncio.to_thread(self.file_exists, object_name)
 
 
 # Singleton accessor
 def get_minio_storage() -> MinIOStorage:
     """Get or create MinIOStorage singleton"""
+    instance = MinIOStorage._instance
+    if instance is not None and instance._client is not None:
+        return instance
     return MinIOStorage()
+
+
+if __name__ == "__main__":
+    # One-shot deploy step: create the bucket once instead of per worker
+    get_minio_storage()._ensure_bucket(force=True)
@@ -64,42 +64,41 @@ from .communication_tools import (
 # Tool Collections by Agent
 # =============================================================================
 
+# Agent-specific tools (all agents also get RAG tools)
+AGENT_TOOLS = {
+    "contract-guardian": CONTRACT_TOOLS,
+    "job-authenticator": SCAM_TOOLS,
+    "risk-advisor": SCAM_TOOLS,
+    "scope-sentinel": FINANCIAL_TOOLS,
+    "payment-enforcer": FINANCIAL_TOOLS,
+    "negotiation-assistant": MARKET_TOOLS,
+    "communication-coach": COMMUNICATION_TOOLS,
+    "profile-analyzer": SCAM_TOOLS[:2],  # Company verify, email analysis
+    "dispute-mediator": CONTRACT_TOOLS[:2] + COMMUNICATION_TOOLS,
+    "talent-vet": MARKET_TOOLS + [analyze_sentiment],
+    "ghosting-shield": COMMUNICATION_TOOLS + [draft_collection_letter],
+    "application-filter": [analyze_sentiment, get_market_rates],
+    "feedback-loop": [save_learning, analyze_sentiment],
+    "planner-role": [estimate_project_value, get_market_rates],
+}
+
+
+def _combine_tools(specific) -> tuple:
+    """RAG tools plus agent-specific tools, deduplicated by name in order."""
+    unique = {}
+    for tool in list(RAG_TOOLS) + list(specific):
+        unique.setdefault(tool.name, tool)
+    return tuple(unique.values())
+
+
+# Tool sets are static, so resolve them once; None is the default (RAG only)
+_AGENT_TOOL_CACHE = {name: _combine_tools(tools) for name, tools in AGENT_TOOLS.items()}
+_AGENT_TOOL_CACHE[None] = _combine_tools([])
+
+
 def get_tools_for_agent(agent_name: str) -> list:
     """Get the appropriate tools for a specific agent."""
-    
-    # All agents get RAG tools
-    base_tools = list(RAG_TOOLS)
-    
-    # Agent-specific tools
-    agent_tools = {
-        "contract-guardian": CONTRACT_TOOLS,
-        "job-authenticator": SCAM_TOOLS,
-        "risk-advisor": SCAM_TOOLS,
-        "scope-sentinel": FINANCIAL_TOOLS,
-        "payment-enforcer": FINANCIAL_TOOLS,
-        "negotiation-assistant": MARKET_TOOLS,
-        "communication-coach": COMMUNICATION_TOOLS,
-        "profile-analyzer": SCAM_TOOLS[:2],  # Company verify, email analysis
-        "dispute-mediator": CONTRACT_TOOLS[:2] + COMMUNICATION_TOOLS,
-        "talent-vet": MARKET_TOOLS + [analyze_sentiment],
-        "ghosting-shield": COMMUNICATION_TOOLS + [draft_collection_letter],
-        "application-filter": [analyze_sentiment, get_market_rates],
-        "feedback-loop": [save_learning, analyze_sentiment],
-        "planner-role": [estimate_project_value, get_market_rates],
-    }
-    
-    specific = agent_tools.get(agent_name, [])
-    
-    # Combine and deduplicate
-    all_tools = base_tools + list(specific)
-    seen = set()
-    unique_tools = []
-    for tool in all_tools:
-        if tool.name not in seen:
-            seen.add(tool.name)
-            unique_tools.append(tool)
-    
-    return unique_tools
+    return list(_AGENT_TOOL_CACHE.get(agent_name, _AGENT_TOOL_CACHE[None]))
 
 
 # All tools combined
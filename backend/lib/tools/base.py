@@ -6,43 +6,58 @@ Foundation for all agent tools with logging, metrics, and error handling.
 
 from typing import Any, Callable, Optional, Type
 from functools import wraps
+from collections import deque
 from loguru import logger
-from pydantic import BaseModel
+from dataclasses import dataclass, asdict
+import os
 import time
 import asyncio
+import threading
 
 
 class ToolMetrics:
-    """Track tool usage metrics."""
+    """Track tool usage metrics (latency averaged over the last LATENCY_WINDOW calls)."""
+    
+    LATENCY_WINDOW = 1024
     
     _calls: dict = {}
     _errors: dict = {}
     _latencies: dict = {}
+    _latency_sums: dict = {}
+    _lock = threading.Lock()
     
     @classmethod
     def record_call(cls, tool_name: str, latency: float, success: bool):
         """Record a tool call."""
-        if tool_name not in cls._calls:
-            cls._calls[tool_name] = 0
-            cls._errors[tool_name] = 0
-            cls._latencies[tool_name] = []
-        
-        cls._calls[tool_name] += 1
-        cls._latencies[tool_name].append(latency)
-        
-        if not success:
-            cls._errors[tool_name] += 1
+        with cls._lock:
+            if tool_name not in cls._calls:
+                cls._calls[tool_name] = 0
+                cls._errors[tool_name] = 0
+                cls._latencies[tool_name] = deque(maxlen=cls.LATENCY_WINDOW)
+                cls._latency_sums[tool_name] = 0.0
+            
+            cls._calls[tool_name] += 1
+            latencies = cls._latencies[tool_name]
+            if len(latencies) == latencies.maxlen:
+                cls._latency_sums[tool_name] -= latencies[0]
+            latencies.append(latency)
+            cls._latency_sums[tool_name] += latency
+            
+            if not success:
+                cls._errors[tool_name] += 1
     
     @classmethod
     def get_stats(cls, tool_name: str = None) -> dict:
         """Get tool usage statistics."""
         if tool_name:
-            latencies = cls._latencies.get(tool_name, [])
+            with cls._lock:
+                count = len(cls._latencies.get(tool_name, ()))
+                total = cls._latency_sums.get(tool_name, 0.0)
             return {
                 "tool": tool_name,
                 "calls": cls._calls.get(tool_name, 0),
                 "errors": cls._errors.get(tool_name, 0),
-                "avg_latency": sum(latencies) / len(latencies) if latencies else 0,
+                "avg_latency": total / count if count else 0,
             }
         return {
             "total_calls": sum(cls._calls.values()),
@@ -51,8 +66,15 @@ class ToolMetrics:
         }
 
 
+# Metrics are opt-in; when off, track_tool only logs failures
+TOOL_METRICS_ENABLED = os.environ.get("FLAGPILOT_TOOL_METRICS", "0") == "1"
+
+
 def track_tool(func: Callable) -> Callable:
-    """Decorator to track tool execution metrics."""
+    """Decorator to track tool execution metrics (FLAGPILOT_TOOL_METRICS=1)."""
+    if not TOOL_METRICS_ENABLED:
+        return _log_failures(func)
+    
     @wraps(func)
     async def async_wrapper(*args, **kwargs):
         start = time.perf_counter()
@@ -67,7 +89,7 @@ def track_tool(func: Callable) -> Callable:
         finally:
             latency = time.perf_counter() - start
             ToolMetrics.record_call(func.__name__, latency, success)
-            logger.debug(f"Tool {func.__name__} completed in {latency:.3f}s")
+            logger.debug("Tool {} completed in {:.3f}s", func.__name__, latency)
     
     @wraps(func)
     def sync_wrapper(*args, **kwargs):
@@ -83,14 +105,38 @@ def track_tool(func: Callable) -> Callable:
         finally:
             latency = time.perf_counter() - start
             ToolMetrics.record_call(func.__name__, latency, success)
-            logger.debug(f"Tool {func.__name__} completed in {latency:.3f}s")
+            logger.debug("Tool {} completed in {:.3f}s", func.__name__, latency)
+    
+    if asyncio.iscoroutinefunction(func):
+        return async_wrapper
+    return sync_wrapper
+
+
+def _log_failures(func: Callable) -> Callable:
+    """Internal: Wrap a tool so failures are still logged, with no timing or metrics."""
+    @wraps(func)
+    async def async_wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Tool {func.__name__} failed: {e}")
+            raise
+    
+    @wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Tool {func.__name__} failed: {e}")
+            raise
     
     if asyncio.iscoroutinefunction(func):
         return async_wrapper
     return sync_wrapper
 
 
-class ToolResult(BaseModel):
+@dataclass(slots=True)
+class ToolResult:
     """Standardized tool result format."""
     success: bool
     data: Any = None
@@ -104,6 +150,10 @@ class ToolResult(BaseModel):
                 return "\n".join(f"- {k}: {v}" for k, v in self.data.items())
             return str(self.data)
         return f"Error: {self.error}"
+    
+    def model_dump(self) -> dict:
+        """Dict form (kept from the former pydantic model)."""
+        return asdict(self)
 
 
 class ToolError(Exception):
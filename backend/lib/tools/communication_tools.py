@@ -4,11 +4,14 @@ Communication Tools
 Tools for professional messaging, email drafting, and sentiment analysis.
 """
 
-from typing import Optional, List
+from collections import Counter
+from types import MappingProxyType
+from typing import Optional, List, Dict, Tuple
 from langchain.tools import tool
 from pydantic import BaseModel, Field
 from loguru import logger
 import re
+import string
 
 from .base import track_tool
 
@@ -41,7 +44,8 @@ class TranslateInput(BaseModel):
 # Email Templates
 # =============================================================================
 
-EMAIL_TEMPLATES = {
+# Read-only: rendered drafts are memoized, so the templates must not change
+EMAIL_TEMPLATES = MappingProxyType({
     "proposal": """Subject: Proposal: {subject}
 
 Hi {name},
@@ -123,9 +127,296 @@ I wish you all the best with the project, and I hope we can work together on som
 
 Best regards,
 [Your Name]""",
+})
+
+# Subject line per email purpose
+EMAIL_SUBJECTS = MappingProxyType({
+    "proposal": "Proposal for Your Project",
+    "follow_up": "Following Up on Our Discussion",
+    "negotiation": "Thoughts on Project Terms",
+    "thank_you": "Thank You",
+    "decline": "Regarding Your Opportunity",
+})
+
+# Tips appended to a draft, per email purpose
+EMAIL_TIPS = MappingProxyType({
+    "proposal": """
+### Proposal Tips
+1. **Lead with their needs**, not your services
+2. **Include social proof** if available
+3. **Make next steps clear** and easy
+4. **Follow up in 3-5 days** if no response
+""",
+    "follow_up": """
+### Follow-up Tips
+1. **Be brief** — respect their time
+2. **Provide value** — share a resource or insight
+3. **Don't be needy** — give them an easy out
+4. **2-3 follow-ups max** before moving on
+""",
+    "negotiation": """
+### Negotiation Tips
+1. **Stay collaborative** — you're on the same team
+2. **Justify your position** with data/value
+3. **Offer alternatives** — maybe payment terms or scope
+4. **Know your minimum** before you start
+""",
+    "decline": """
+### Declining Tips
+1. **Be gracious** — leave the door open
+2. **Be brief** — no explanation needed
+3. **Suggest alternatives** if possible
+4. **Don't apologize excessively**
+""",
+})
+
+# Phrase rewrites applied to a draft for each tone
+TONE_REPLACEMENTS = {
+    "friendly": {
+        "Best regards,": "Cheers,",
+        "I hope you're doing well.": "Hope you're having a great week!",
+    },
+    "firm": {
+        "I wanted to": "I need to",
+        "would love to": "would like to",
+    },
 }
 
 
+# =============================================================================
+# Translation Phrases
+# =============================================================================
+
+# Common business phrases (expanded in production)
+_PHRASE_TRANSLATIONS = {
+    "spanish": {
+        "formal": {
+            "Hello": "Estimado/a",
+            "Thank you": "Muchas gracias",
+            "Looking forward to hearing from you": "Quedo a la espera de su respuesta",
+            "Best regards": "Atentamente",
+            "Please let me know": "Por favor, hágamelo saber",
+            "I appreciate your time": "Agradezco su tiempo",
+        },
+        "informal": {
+            "Hello": "Hola",
+            "Thank you": "Gracias",
+            "Looking forward to hearing from you": "Espero tu respuesta",
+            "Best regards": "Saludos",
+            "Please let me know": "Avísame",
+            "I appreciate your time": "Gracias por tu tiempo",
+        }
+    },
+    "french": {
+        "formal": {
+            "Hello": "Madame, Monsieur",
+            "Thank you": "Je vous remercie",
+            "Looking forward to hearing from you": "Dans l'attente de votre réponse",
+            "Best regards": "Cordialement",
+            "Please let me know": "Veuillez me faire savoir",
+            "I appreciate your time": "Je vous remercie pour votre temps",
+        },
+        "informal": {
+            "Hello": "Bonjour",
+            "Thank you": "Merci",
+            "Best regards": "Bien à toi",
+        }
+    },
+    "german": {
+        "formal": {
+            "Hello": "Sehr geehrte Damen und Herren",
+            "Thank you": "Vielen Dank",
+            "Looking forward to hearing from you": "Ich freue mich auf Ihre Antwort",
+            "Best regards": "Mit freundlichen Grüßen",
+        }
+    },
+}
+
+# Read-only view at every level
+PHRASE_TRANSLATIONS = MappingProxyType({
+    lang: MappingProxyType({form: MappingProxyType(phrases) for form, phrases in forms.items()})
+    for lang, forms in _PHRASE_TRANSLATIONS.items()
+})
+
+FORMALITIES = ("formal", "informal")
+
+# Markdown table rows per (language, formality), rendered once at import.
+# A formality a language lacks falls back to its formal phrases.
+_PHRASE_ROWS = {
+    (lang, form): "".join(
+        f"| {eng} | {trans} |\n"
+        for eng, trans in forms.get(form, forms.get("formal", {})).items()
+    )
+    for lang, forms in PHRASE_TRANSLATIONS.items()
+    for form in FORMALITIES
+}
+
+# Etiquette notes per language
+CULTURAL_TIPS = MappingProxyType({
+    "spanish": """- Use formal "usted" for business (not "tú")
+- Greetings are important — don't skip them
+- Last names are double (maternal + paternal)
+- Be aware of regional variations (Spain vs Latin America)""",
+    "french": """- Use "vous" (formal you) in business
+- Titles are important (Monsieur, Madame)
+- Keep a formal tone until invited otherwise
+- Written French tends to be more formal than spoken""",
+    "german": """- German business communication is very formal
+- Use full titles (Herr Doktor, etc.)
+- Punctuality and directness are valued
+- Keep small talk minimal"""
+})
+
+def _escape_braces(value: str) -> str:
+    """Make static text safe to embed in a str.format template."""
+    return value.replace("{", "{{").replace("}", "}}")
+
+
+# Full translation response per (language, formality), assembled once at
+# import; only the requested formality label and the text are filled per call
+_TRANSLATION_TEMPLATES = {
+    (lang, form): f"""## Translation Assistance: {lang.title()} ({{formality}})
+
+### Common Business Phrases
+
+| English | {lang.title()} |
+|---------|{'-' * len(lang)}|
+{_escape_braces(rows)}
+
+### Original Text
+```
+{{text}}
+```
+
+### Translation Notes
+
+⚠️ **Important:** This provides phrase guidance only. For accurate full translation:
+1. Use **DeepL** (deepl.com) - best quality
+2. Use **Google Translate** - widely available
+3. For contracts/legal: Use certified translator
+
+### Cultural Tips for {lang.title()}
+{_escape_braces(CULTURAL_TIPS.get(lang, "Research cultural norms for your specific audience."))}"""
+    for (lang, form), rows in _PHRASE_ROWS.items()
+}
+
+# Response for languages without a phrase library
+_UNSUPPORTED_TEMPLATE = """## Translation Assistance
+
+**Target Language:** {title}
+
+⚠️ Detailed phrase library for {language} is not available.
+
+### Recommended Actions:
+1. Use **DeepL** (deepl.com) for high-quality professional translations
+2. For legal/contract documents, hire a professional translator
+3. Use **Google Translate** for initial drafts, then have a native speaker review
+
+### Key Tips for Professional Translation:
+- Keep sentences short and clear
+- Avoid idioms and slang
+- Use formal pronouns when in doubt
+- Have a native speaker review important communications
+"""
+
+
+# =============================================================================
+# Sentiment Lexicons
+# =============================================================================
+
+# Frozen sets: O(1) membership checks, no accidental mutation
+SENTIMENT_LEXICONS = {
+    "positive": frozenset({
+        "thank", "great", "excellent", "appreciate", "wonderful", "excited",
+        "love", "happy", "pleased", "perfect", "awesome", "fantastic",
+        "amazing", "helpful", "impressed"
+    }),
+    "negative": frozenset({
+        "disappointed", "frustrated", "upset", "angry", "unacceptable",
+        "terrible", "awful", "worst", "hate", "never", "problem",
+        "complaint", "refund", "cancel", "sue", "lawyer"
+    }),
+    "urgent": frozenset({
+        "urgent", "asap", "immediately", "now", "deadline", "critical",
+        "emergency", "right away", "today", "hurry"
+    }),
+    "passive_aggressive": frozenset({
+        "per my last email", "as i mentioned", "going forward",
+        "i would have thought", "i'm confused why", "with all due respect",
+        "as per your request", "just to be clear"
+    }),
+}
+
+# Lexicons each term belongs to (terms sorted so the matcher builds deterministically)
+_TERM_LEXICONS: Dict[str, tuple] = {}
+for _name, _terms in SENTIMENT_LEXICONS.items():
+    for _term in sorted(_terms):
+        _TERM_LEXICONS[_term] = _TERM_LEXICONS.get(_term, ()) + (_name,)
+
+# Pattern registry: compiled once at import. Tools that need a pattern
+# register it here rather than calling re.* with a string at call time.
+# The lexicon pattern uses a lookahead so every position is tested and
+# overlapping terms are all seen, i.e. plain substring semantics. Only one
+# term can match per position, so no term may be a prefix of another.
+_PATTERNS = {
+    "lexicon": re.compile("(?=(" + "|".join(map(re.escape, _TERM_LEXICONS)) + "))"),
+    **{
+        f"tone_{tone}": re.compile("|".join(map(re.escape, replacements)))
+        for tone, replacements in TONE_REPLACEMENTS.items()
+    },
+}
+
+def _count_lexicons(text_lower: str) -> Dict[str, int]:
+    """
+    Number of distinct terms from each lexicon that occur in the
+    (lowercased) text, found in a single pass over it.
+    """
+    found = {m.group(1) for m in _PATTERNS["lexicon"].finditer(text_lower)}
+
+    counts = dict.fromkeys(SENTIMENT_LEXICONS, 0)
+    for term in found:
+        for lexicon in _TERM_LEXICONS[term]:
+            counts[lexicon] += 1
+    return counts
+
+
+# Deletes ASCII capitals; the length difference is the caps count
+_STRIP_UPPER = str.maketrans("", "", string.ascii_uppercase)
+
+
+def _char_stats(text: str) -> Tuple[int, int, int]:
+    """
+    (exclamation marks, question marks, uppercase characters) in the text.
+    ASCII text is counted with C-level str methods; anything else from one
+    character histogram instead of a pass per statistic.
+    """
+    if text.isascii():
+        caps = len(text) - len(text.translate(_STRIP_UPPER))
+        return text.count("!"), text.count("?"), caps
+    
+    histogram = Counter(text)
+    caps = sum(n for c, n in histogram.items() if c.isupper())
+    return histogram["!"], histogram["?"], caps
+
+
+def _render_email(purpose_key: str, name: str, subject: str, context: str, tone: str) -> str:
+    """Fill the purpose's template and apply the tone."""
+    email = EMAIL_TEMPLATES[purpose_key].format(
+        name=name,
+        subject=subject,
+        context=context
+    )
+    
+    # Adjust tone (all of a tone's rewrites in one pass)
+    if tone in TONE_REPLACEMENTS:
+        replacements = TONE_REPLACEMENTS[tone]
+        email = _PATTERNS[f"tone_{tone}"].sub(lambda m: replacements[m.group(0)], email)
+    elif tone == "apologetic":
+        email = "I hope this finds you well. I wanted to reach out regarding... " + email
+    
+    return email
+
+
 # =============================================================================
 # Tools
 # =============================================================================
@@ -148,66 +439,11 @@ async def draft_professional_email(
     if purpose_key not in EMAIL_TEMPLATES:
         purpose_key = "follow_up"  # Default
     
-    template = EMAIL_TEMPLATES[purpose_key]
-    
     # Generate subject
-    subjects = {
-        "proposal": f"Proposal for Your Project",
-        "follow_up": f"Following Up on Our Discussion",
-        "negotiation": f"Thoughts on Project Terms",
-        "thank_you": f"Thank You",
-        "decline": f"Regarding Your Opportunity",
-    }
-    subject = subjects.get(purpose_key, "Following Up")
-    
-    # Apply template
-    email = template.format(
-        name=recipient_name,
-        subject=subject,
-        context=context
-    )
+    subject = EMAIL_SUBJECTS.get(purpose_key, "Following Up")
     
-    # Adjust tone
-    if tone == "friendly":
-        email = email.replace("Best regards,", "Cheers,")
-        email = email.replace("I hope you're doing well.", "Hope you're having a great week!")
-    elif tone == "firm":
-        email = email.replace("I wanted to", "I need to")
-        email = email.replace("would love to", "would like to")
-    elif tone == "apologetic":
-        email = "I hope this finds you well. I wanted to reach out regarding... " + email
-    
-    # Add tips
-    tips = {
-        "proposal": """
-### Proposal Tips
-1. **Lead with their needs**, not your services
-2. **Include social proof** if available
-3. **Make next steps clear** and easy
-4. **Follow up in 3-5 days** if no response
-""",
-        "follow_up": """
-### Follow-up Tips
-1. **Be brief** — respect their time
-2. **Provide value** — share a resource or insight
-3. **Don't be needy** — give them an easy out
-4. **2-3 follow-ups max** before moving on
-""",
-        "negotiation": """
-### Negotiation Tips
-1. **Stay collaborative** — you're on the same team
-2. **Justify your position** with data/value
-3. **Offer alternatives** — maybe payment terms or scope
-4. **Know your minimum** before you start
-""",
-        "decline": """
-### Declining Tips
-1. **Be gracious** — leave the door open
-2. **Be brief** — no explanation needed
-3. **Suggest alternatives** if possible
-4. **Don't apologize excessively**
-""",
-    }
+    # Apply template and tone
+    email = _render_email(purpose_key, recipient_name, subject, context, tone)
     
     return f"""## Email Draft: {purpose.title()}
 
@@ -217,7 +453,7 @@ async def draft_professional_email(
 {email}
 ```
 
-{tips.get(purpose_key, '')}
+{EMAIL_TIPS.get(purpose_key, '')}
 
 ---
 
@@ -245,42 +481,20 @@ async def analyze_sentiment(
     Analyze the sentiment and tone of a message.
     Detects emotional cues, urgency, and potential red flags in communication.
     """
-    text_lower = text.lower()
-    
-    # Sentiment indicators
-    positive_words = [
-        "thank", "great", "excellent", "appreciate", "wonderful", "excited",
-        "love", "happy", "pleased", "perfect", "awesome", "fantastic",
-        "amazing", "helpful", "impressed"
-    ]
-    
-    negative_words = [
-        "disappointed", "frustrated", "upset", "angry", "unacceptable",
-        "terrible", "awful", "worst", "hate", "never", "problem",
-        "complaint", "refund", "cancel", "sue", "lawyer"
-    ]
+    # Analyze punctuation
+    exclamation_count, question_count, caps_count = _char_stats(text)
+    caps_ratio = caps_count / max(len(text), 1)
     
-    urgent_words = [
-        "urgent", "asap", "immediately", "now", "deadline", "critical",
-        "emergency", "right away", "today", "hurry"
-    ]
-    
-    passive_aggressive = [
-        "per my last email", "as i mentioned", "going forward",
-        "i would have thought", "i'm confused why", "with all due respect",
-        "as per your request", "just to be clear"
-    ]
+    # Lexicon terms are lowercase ASCII, so text without uppercase
+    # characters can be matched as-is instead of copied by lower()
+    text_lower = text.lower() if caps_count else text
     
     # Count matches
-    positive_count = sum(1 for w in positive_words if w in text_lower)
-    negative_count = sum(1 for w in negative_words if w in text_lower)
-    urgent_count = sum(1 for w in urgent_words if w in text_lower)
-    pa_count = sum(1 for phrase in passive_aggressive if phrase in text_lower)
-    
-    # Analyze punctuation
-    exclamation_count = text.count('!')
-    caps_ratio = sum(1 for c in text if c.isupper()) / max(len(text), 1)
-    question_count = text.count('?')
+    counts = _count_lexicons(text_lower)
+    positive_count = counts["positive"]
+    negative_count = counts["negative"]
+    urgent_count = counts["urgent"]
+    pa_count = counts["passive_aggressive"]
     
     # Calculate overall sentiment
     sentiment_score = positive_count - (negative_count * 2)
@@ -369,121 +583,18 @@ async def translate_message(
     Provide translation guidance and key phrases for professional communication.
     Note: For production, integrate with DeepL or Google Translate API.
     """
-    # Common business phrases (expanded in production)
-    phrase_translations = {
-        "spanish": {
-            "formal": {
-                "Hello": "Estimado/a",
-                "Thank you": "Muchas gracias",
-                "Looking forward to hearing from you": "Quedo a la espera de su respuesta",
-                "Best regards": "Atentamente",
-                "Please let me know": "Por favor, hágamelo saber",
-                "I appreciate your time": "Agradezco su tiempo",
-            },
-            "informal": {
-                "Hello": "Hola",
-                "Thank you": "Gracias",
-                "Looking forward to hearing from you": "Espero tu respuesta",
-                "Best regards": "Saludos",
-                "Please let me know": "Avísame",
-                "I appreciate your time": "Gracias por tu tiempo",
-            }
-        },
-        "french": {
-            "formal": {
-                "Hello": "Madame, Monsieur",
-                "Thank you": "Je vous remercie",
-                "Looking forward to hearing from you": "Dans l'attente de votre réponse",
-                "Best regards": "Cordialement",
-                "Please let me know": "Veuillez me faire savoir",
-                "I appreciate your time": "Je vous remercie pour votre temps",
-            },
-            "informal": {
-                "Hello": "Bonjour",
-                "Thank you": "Merci",
-                "Best regards": "Bien à toi",
-            }
-        },
-        "german": {
-            "formal": {
-                "Hello": "Sehr geehrte Damen und Herren",
-                "Thank you": "Vielen Dank",
-                "Looking forward to hearing from you": "Ich freue mich auf Ihre Antwort",
-                "Best regards": "Mit freundlichen Grüßen",
-            }
-        },
-    }
-    
     lang_key = target_language.lower()
     form_key = formality.lower()
     
-    if lang_key not in phrase_translations:
-        return f"""## Translation Assistance
-
-**Target Language:** {target_language.title()}
-
-⚠️ Detailed phrase library for {target_language} is not available.
-
-### Recommended Actions:
-1. Use **DeepL** (deepl.com) for high-quality professional translations
-2. For legal/contract documents, hire a professional translator
-3. Use **Google Translate** for initial drafts, then have a native speaker review
-
-### Key Tips for Professional Translation:
-- Keep sentences short and clear
-- Avoid idioms and slang
-- Use formal pronouns when in doubt
-- Have a native speaker review important communications
-"""
-    
-    phrases = phrase_translations[lang_key].get(form_key, phrase_translations[lang_key].get("formal", {}))
-    
-    result = f"""## Translation Assistance: {target_language.title()} ({formality.title()})
-
-### Common Business Phrases
-
-| English | {target_language.title()} |
-|---------|{'-' * len(target_language)}|
-"""
-    
-    for eng, trans in phrases.items():
-        result += f"| {eng} | {trans} |\n"
-    
-    result += f"""
-
-### Original Text
-```
-{text}
-```
-
-### Translation Notes
-
-⚠️ **Important:** This provides phrase guidance only. For accurate full translation:
-1. Use **DeepL** (deepl.com) - best quality
-2. Use **Google Translate** - widely available
-3. For contracts/legal: Use certified translator
-
-### Cultural Tips for {target_language.title()}
-"""
-    
-    cultural_tips = {
-        "spanish": """- Use formal "usted" for business (not "tú")
-- Greetings are important — don't skip them
-- Last names are double (maternal + paternal)
-- Be aware of regional variations (Spain vs Latin America)""",
-        "french": """- Use "vous" (formal you) in business
-- Titles are important (Monsieur, Madame)
-- Keep a formal tone until invited otherwise
-- Written French tends to be more formal than spoken""",
-        "german": """- German business communication is very formal
-- Use full titles (Herr Doktor, etc.)
-- Punctuality and directness are valued
-- Keep small talk minimal"""
-    }
+    template = _TRANSLATION_TEMPLATES.get((lang_key, form_key))
+    if template is None:
+        # Unknown formality: use the formal phrases
+        template = _TRANSLATION_TEMPLATES.get((lang_key, "formal"))
     
-    result += cultural_tips.get(lang_key, "Research cultural norms for your specific audience.")
+    if template is None:
+        return _UNSUPPORTED_TEMPLATE.format(title=target_language.title(), language=target_language)
     
-    return result
+    return template.format(formality=formality.title(), text=text)
 
 
 # =============================================================================
@@ -128,6 +128,32 @@ CLAUSE_PATTERNS = {
 }
 
 
+# Compiled once at import: each clause type's patterns, individually and fused
+# into one case-insensitive alternation, run against the original contract (so match
+# offsets index it directly), and risk keywords are pre-lowercased to match
+# the lowercased contract
+_CLAUSE_MATCHERS = {
+    clause_type: {
+        "pattern": re.compile(
+            "|".join(f"(?:{p})" for p in data["patterns"]), re.IGNORECASE
+        ),
+        "patterns": [re.compile(p, re.IGNORECASE) for p in data["patterns"]],
+        "risk_keywords": {
+            level: [k.lower() for k in keywords]
+            for level, keywords in data["risk_keywords"].items()
+        },
+    }
+    for clause_type, data in CLAUSE_PATTERNS.items()
+}
+
+# Liability cap detection, in priority order
+_LIABILITY_CAP_PATTERNS = [
+    (re.compile(r"liability.*(?:not exceed|limited to|capped at).*\$?([\d,]+)"), "explicit"),
+    (re.compile(r"(\d+)x.*(?:contract|fees|amount)"), "multiplier"),
+    (re.compile(r"unlimited liability"), "unlimited"),
+]
+
+
 # =============================================================================
 # Tools
 # =============================================================================
@@ -151,26 +177,22 @@ async def analyze_contract_clauses(
     clause_count = 0
     
     for clause_type in clause_types:
-        if clause_type not in CLAUSE_PATTERNS:
+        if clause_type not in _CLAUSE_MATCHERS:
             continue
             
-        pattern_data = CLAUSE_PATTERNS[clause_type]
-        
-        # Find matching sentences
-        found_content = []
-        for pattern in pattern_data["patterns"]:
-            matches = re.finditer(pattern, text_lower)
-            for match in matches:
-                # Extract surrounding context (sentence)
-                start = max(0, match.start() - 100)
-                end = min(len(text_lower), match.end() + 100)
-                context = contract_text[start:end].strip()
-                if context not in found_content:
-                    found_content.append(context)
+        pattern_data = _CLAUSE_MATCHERS[clause_type]
         
-        if not found_content:
+        # One pass rules out absent clauses; otherwise the excerpt follows the
+        # first listed pattern that matches, not the leftmost of any pattern
+        if not pattern_data["pattern"].search(contract_text):
             results.append(f"### {clause_type.upper().replace('_', ' ')} Clause\n❌ Not found in contract\n")
             continue
+        match = next(filter(None, (p.search(contract_text) for p in pattern_data["patterns"])))
+        
+        # Extract surrounding context (sentence)
+        start = max(0, match.start() - 100)
+        end = min(len(contract_text), match.end() + 100)
+        found_content = contract_text[start:end].strip()
         
         # Assess risk level
         risk_level = "low"
@@ -178,7 +200,7 @@ async def analyze_contract_clauses(
         
         for level in ["high", "medium", "low"]:
             for keyword in pattern_data["risk_keywords"].get(level, []):
-                if keyword.lower() in text_lower:
+                if keyword in text_lower:
                     if level in ["high", "medium"]:
                         risk_level = level
                         risk_reasons.append(keyword)
@@ -200,7 +222,7 @@ async def analyze_contract_clauses(
 
 **Found Terms:**
 ```
-{found_content[0][:200]}...
+{found_content[:200]}...
 ```
 
 """
@@ -453,14 +475,8 @@ async def calculate_liability_exposure(
     
     # Detect liability cap
     liability_cap = None
-    cap_patterns = [
-        (r"liability.*(?:not exceed|limited to|capped at).*\$?([\d,]+)", "explicit"),
-        (r"(\d+)x.*(?:contract|fees|amount)", "multiplier"),
-        (r"unlimited liability", "unlimited"),
-    ]
-    
-    for pattern, cap_type in cap_patterns:
-        match = re.search(pattern, text_lower)
+    for pattern, cap_type in _LIABILITY_CAP_PATTERNS:
+        match = pattern.search(text_lower)
         if match:
             if cap_type == "unlimited":
                 liability_cap = ("unlimited", float('inf'))
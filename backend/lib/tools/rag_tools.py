@@ -89,12 +89,13 @@ async def get_user_context(
     Helps agents provide personalized recommendations based on user's past interactions.
     """
     try:
-        from lib.memory.manager import MemoryManager
+        from lib.memory.manager import get_memory_manager
         
-        memory = MemoryManager()
+        memory = get_memory_manager()
+        connected = await memory.ensure_ready()
         context_parts = []
         
-        if include_profile and memory.connected:
+        if include_profile and connected:
             profile = await memory.get_user_profile(user_id)
             if profile.get("summary"):
                 context_parts.append(f"**User Profile:**\n{profile['summary']}")
@@ -102,7 +103,7 @@ async def get_user_context(
                 prefs = profile["preferences"]
                 context_parts.append(f"**Preferences:** {prefs}")
         
-        if include_history and memory.connected:
+        if include_history and connected:
             history = await memory.get_chat_history(user_id, limit=5)
             if history:
                 recent = [f"- {h.get('role', 'user')}: {h.get('content', '')[:100]}..." for h in history[:3]]
@@ -132,11 +133,11 @@ async def save_learning(
     These learnings are anonymized and can help improve recommendations for all users.
     """
     try:
-        from lib.memory.manager import MemoryManager
+        from lib.memory.manager import get_memory_manager
         
-        memory = MemoryManager()
+        memory = get_memory_manager()
         
-        if not memory.connected:
+        if not await memory.ensure_ready():
             return "Memory system unavailable. Learning not saved."
         
         # Save to experience gallery
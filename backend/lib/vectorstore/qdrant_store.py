@@ -89,6 +89,11 @@ class QdrantStore:
         """Get LangChain vector store"""
         return self._vector_store
     
+    @property
+    def embeddings(self) -> OpenAIEmbeddings:
+        """Get the embeddings model"""
+        return self._embeddings
+    
     async def add_documents(
         self,
         documents: List[Document],
@@ -106,6 +111,16 @@ class QdrantStore:
             logger.error(f"Failed to add documents: {e}")
             raise
     
+    async def delete_documents(self, ids: List[str]) -> bool:
+        """Delete documents by ID"""
+        try:
+            await self._vector_store.adelete(ids=ids)
+            logger.info(f"Deleted {len(ids)} documents from Qdrant")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete documents: {e}")
+            return False
+    
     async def similarity_search(
         self,
         query: str,
@@ -125,6 +140,25 @@ class QdrantStore:
             logger.error(f"Similarity search failed: {e}")
             return []
     
+    async def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Document]:
+        """Search for similar documents with a precomputed query embedding"""
+        try:
+            results = await self._vector_store.asimilarity_search_by_vector(
+                embedding=embedding,
+                k=k,
+                filter=filter,
+            )
+            logger.debug(f"Found {len(results)} similar documents")
+            return results
+        except Exception as e:
+            logger.error(f"Similarity search failed: {e}")
+            return []
+    
     async def similarity_search_with_score(
         self,
         query: str,
@@ -17,6 +17,7 @@ NOTE: Auth and chat persistence are handled by the frontend.
 """
 
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -42,6 +43,52 @@ else:
     logger.info("ℹ️ LangSmith tracing disabled (no API key)")
 
 
+# =============================================================================
+# Lifespan
+# =============================================================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared connection pools on startup and close them on shutdown"""
+    from lib.persistence import CheckpointerFactory, LongTermMemoryStore, close_pg_pool
+
+    # Checkpointer on the shared PostgreSQL pool, long-term memory on its own connection
+    try:
+        app.state.checkpointer = await CheckpointerFactory.open()
+    except Exception as e:
+        logger.error(f"Checkpointer setup failed: {e}")
+
+    try:
+        app.state.long_term_memory = await LongTermMemoryStore.open()
+    except Exception as e:
+        logger.error(f"Long-term memory setup failed: {e}")
+
+    # Redis backs rate limiting and caching; the app runs without it
+    from lib import init_redis, close_redis
+    from lib.rate_limit import load_scripts
+    await init_redis()
+    await load_scripts()
+
+    # Load the RAG context tokenizer now rather than on the first request
+    from lib.rag import warm_tokenizer
+    await warm_tokenizer()
+
+    # Connect the memory system without blocking boot on a slow Elasticsearch;
+    # ensure_ready() bounds its own wait and leaves the probe running
+    try:
+        from lib.memory.manager import get_memory_manager
+        if not await get_memory_manager().ensure_ready():
+            logger.warning("Memory not ready yet, connecting lazily on first use")
+    except Exception as e:
+        logger.warning(f"Memory warm-up failed: {e}")
+
+    yield
+
+    await LongTermMemoryStore.close()
+    await CheckpointerFactory.close()
+    await close_pg_pool()
+    await close_redis()
+
+
 # =============================================================================
 # App Setup
 # =============================================================================
@@ -49,6 +96,7 @@ app = FastAPI(
     title="FlagPilot Agent API",
     description="LangGraph multi-agent server with CopilotKit + Qdrant + MinIO. 17 AI agents with team orchestration.",
     version="7.0.0",
+    lifespan=lifespan,
 )
 
 # CORS - Allow frontend origins
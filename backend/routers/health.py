@@ -25,11 +25,16 @@ async def service_health() -> Dict[str, ServiceStatus]:
     
     # Redis
     try:
-        from lib.redis_client import get_redis
+        from lib.redis_client import get_redis, get_redis_pool_stats
         redis = get_redis()
         if redis:
             await redis.ping()
-            services["redis"] = ServiceStatus(status="healthy", message="Connected")
+            pool = get_redis_pool_stats()
+            if pool and "in_use" in pool:
+                message = f"Connected, {pool['in_use']}/{pool['max']} connections in use"
+            else:
+                message = "Connected"
+            services["redis"] = ServiceStatus(status="healthy", message=message)
         else:
             services["redis"] = ServiceStatus(status="unavailable", message="Not configured")
     except Exception as e:
@@ -117,7 +122,7 @@ async def rag_health() -> Dict:
         minio = get_minio_storage()
         
         collection_info = qdrant.get_collection_info()
-        files = minio.list_files()
+        files = await minio.alist_files()
         
         return {
             "status": "healthy",
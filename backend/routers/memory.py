@@ -11,6 +11,7 @@ Provides API endpoints for the memory system:
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+from datetime import datetime, timezone
 from loguru import logger
 
 from lib.auth.middleware import get_current_user, get_optional_user
@@ -46,6 +47,13 @@ class UserProfile(BaseModel):
     last_updated: Optional[str] = None
 
 
+def _format_timestamp(value: Any) -> str:
+    """Render an ES timestamp (epoch millis or legacy ISO string) as ISO-8601."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).isoformat()
+    return value or ""
+
+
 # ============================================
 # Wisdom Endpoints
 # ============================================
@@ -64,7 +72,7 @@ async def get_global_wisdom(
     try:
         memory = get_memory_manager()
         
-        if not memory.connected:
+        if not await memory.ensure_ready():
             # Return sample wisdom when ES is not connected
             logger.warning("ES not connected, returning sample wisdom")
             return [
@@ -128,7 +136,7 @@ async def get_user_profile(
     try:
         memory = get_memory_manager()
         
-        if not memory.connected or user_id == "anonymous":
+        if user_id == "anonymous" or not await memory.ensure_ready():
             return UserProfile(
                 user_id=user_id,
                 summary="",
@@ -143,7 +151,7 @@ async def get_user_profile(
             summary=profile.get("summary", ""),
             preferences=profile.get("preferences", {}),
             risk_tolerance=profile.get("risk_tolerance"),
-            last_updated=profile.get("last_updated")
+            last_updated=_format_timestamp(profile.get("last_updated")) or None
         )
         
     except Exception as e:
@@ -166,7 +174,7 @@ async def get_recent_sessions(
     try:
         memory = get_memory_manager()
         
-        if not memory.connected or user_id == "anonymous":
+        if user_id == "anonymous" or not await memory.ensure_ready():
             return []
         
         session_ids = await memory.get_recent_sessions(user_id, limit=limit)
@@ -179,7 +187,7 @@ async def get_recent_sessions(
             
             sessions.append(ChatSession(
                 session_id=sid,
-                timestamp=history[0].get("timestamp", "") if history else "",
+                timestamp=_format_timestamp(history[0].get("timestamp")) if history else "",
                 message_count=len(history),
                 preview=preview
             ))
@@ -199,8 +207,9 @@ async def get_recent_sessions(
 async def memory_health():
     """Check memory system health."""
     memory = get_memory_manager()
+    connected = await memory.ensure_ready()
     return {
-        "status": "healthy" if memory.connected else "degraded",
-        "connected": memory.connected,
-        "stats": memory.get_stats() if memory.connected else {}
+        "status": "healthy" if connected else "degraded",
+        "connected": connected,
+        "stats": memory.get_stats() if connected else {}
     }
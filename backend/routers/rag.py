@@ -157,13 +157,14 @@ async def get_collection_info():
 @router.get("/files")
 async def list_files(
     prefix: str = "",
+    limit: Optional[int] = None,
     user_id: str = Depends(require_auth),
 ):
     """List files in MinIO storage for authenticated user"""
     try:
         minio = get_minio_storage()
         # Only list files in user's directory
-        files = minio.list_files(prefix=user_id + "/" if not prefix else prefix)
+        files = await minio.alist_files(prefix=user_id + "/" if not prefix else prefix, limit=limit)
         return {"files": files}
     except Exception as e:
         logger.error(f"Failed to list files: {e}")
@@ -183,7 +184,7 @@ async def get_file_url(
             raise HTTPException(status_code=403, detail="Access denied to this file")
         
         minio = get_minio_storage()
-        url = minio.get_presigned_url(object_name, expires=expires)
+        url = await minio.aget_presigned_url(object_name, expires=expires)
         return {"url": url}
     except Exception as e:
         logger.error(f"Failed to get file URL: {e}")
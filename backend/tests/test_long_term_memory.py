@@ -0,0 +1,103 @@
+"""
+Long-Term Memory Tests
+======================
+Unit tests for the namespace Bloom filter in lib.persistence.long_term_memory:
+no false negatives, and recall failing open whenever the filter can't be
+trusted. Runs on the InMemoryStore fallback; no database needed.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.persistence import long_term_memory
+from lib.persistence.long_term_memory import BloomFilter, LongTermMemoryStore
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    """A fresh store on InMemoryStore (never the shared singleton)."""
+    monkeypatch.setattr(long_term_memory, "DATABASE_URL", None)
+    return LongTermMemoryStore()
+
+
+class TestBloomFilter:
+    """BloomFilter membership"""
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter()
+        users = [f"user-{i}" for i in range(5000)]
+        for user in users:
+            bloom.add(user)
+        assert all(user in bloom for user in users)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter()
+        for i in range(10_000):
+            bloom.add(f"user-{i}")
+        false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+        assert false_positives < 100
+
+
+class TestNamespaceFilter:
+    """_may_have_memories and the background rebuild"""
+
+    def test_fails_open_without_filter(self, memory):
+        assert memory._namespaces is None
+        assert memory._may_have_memories("anyone")
+
+    def test_fresh_filter_skips_unknown_users(self, memory, monkeypatch):
+        memory._rebuild_namespace_filter()
+        assert not memory._may_have_memories("nobody")
+
+        # recall never reaches the store for a user with no namespace
+        def search(self, *args, **kwargs):
+            raise AssertionError("store searched")
+
+        monkeypatch.setattr(type(memory._store), "search", search)
+        assert memory.recall("nobody", "anything") == []
+
+    def test_fails_open_when_stale(self, memory):
+        memory._rebuild_namespace_filter()
+        memory._namespaces_loaded_at = time.monotonic() - memory.NAMESPACE_FILTER_MAX_AGE - 1
+        assert memory._may_have_memories("nobody")
+
+    def test_fails_open_when_rebuild_fails(self, memory, monkeypatch):
+        memory._rebuild_namespace_filter()
+
+        def list_namespaces(self, *args, **kwargs):
+            raise ConnectionError("database went away")
+
+        monkeypatch.setattr(type(memory._store), "list_namespaces", list_namespaces)
+        memory._rebuild_namespace_filter()
+        assert memory._namespaces is None
+        assert memory._may_have_memories("nobody")
+
+    def test_rebuild_picks_up_stored_users(self, memory):
+        assert memory.remember("alice", "k", {"note": "prefers net 15"})
+        memory._namespaces = None
+        memory._rebuild_namespace_filter()
+        assert memory._may_have_memories("alice")
+        assert memory.recall("alice", "net 15") == [{"note": "prefers net 15"}]
+
+    def test_writes_during_rebuild_are_kept(self, memory, monkeypatch):
+        # A write landing while the store is being listed must survive the swap
+        def list_namespaces(self, *args, **kwargs):
+            memory.remember("late", "k", {"note": "written mid-rebuild"})
+            return [("memories", "early")]
+
+        monkeypatch.setattr(type(memory._store), "list_namespaces", list_namespaces)
+        memory._rebuild_namespace_filter()
+        assert memory._may_have_memories("early")
+        assert memory._may_have_memories("late")
+        assert not memory._may_have_memories("nobody")
+
+    def test_write_adds_to_live_filter(self, memory):
+        memory._rebuild_namespace_filter()
+        assert not memory._may_have_memories("bob")
+        memory.remember("bob", "k", {"note": "hi"})
+        assert memory._may_have_memories("bob")
@@ -0,0 +1,192 @@
+"""
+RAG Pipeline Tests
+==================
+Unit tests for lib.rag.pipeline: retrieval caching and in-flight request
+coalescing, and rollback of partially ingested batches. The vector store is
+replaced by an in-test fake; no Qdrant, MinIO or embedding API needed.
+"""
+
+import asyncio
+import os
+import sys
+from typing import List, Optional
+
+import pytest
+from langchain_core.documents import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.rag.pipeline import RAGPipeline
+
+
+class FakeEmbeddings:
+    """Counts embedding calls; queries map to fixed vectors."""
+
+    def __init__(self):
+        self.calls = 0
+        self.vectors = {}
+
+    async def aembed_query(self, query: str) -> List[float]:
+        self.calls += 1
+        return self.vectors.get(query, [0.1, 0.2, 0.3])
+
+
+class FakeQdrant:
+    """Stands in for QdrantVectorStore: searches wait on an optional gate, adds can fail."""
+
+    def __init__(self):
+        self.embeddings = FakeEmbeddings()
+        self.gate: Optional[asyncio.Event] = None
+        self.results = [Document(page_content="Net 30 payment terms", metadata={"source": "msa.pdf"})]
+        self.search_calls = 0
+        self.fail_at = set()
+        self.added: List[Document] = []
+        self.deleted: List[str] = []
+
+    async def similarity_search_by_vector(self, embedding, k, filter=None):
+        self.search_calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return list(self.results)
+
+    async def add_documents(self, documents: List[Document]) -> List[str]:
+        await asyncio.sleep(0)
+        if any(doc.metadata["chunk_index"] in self.fail_at for doc in documents):
+            raise RuntimeError("embedding request failed")
+        self.added.extend(documents)
+        return [doc.metadata["chunk_id"] for doc in documents]
+
+    async def delete_documents(self, ids: List[str]):
+        self.deleted.extend(ids)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    RAGPipeline.clear_cache()
+    RAGPipeline._inflight.clear()
+    yield
+    RAGPipeline.clear_cache()
+    RAGPipeline._inflight.clear()
+
+
+@pytest.fixture
+def qdrant():
+    return FakeQdrant()
+
+
+@pytest.fixture
+def pipeline(qdrant):
+    # Skip __init__: it connects to Qdrant and MinIO
+    pipeline = RAGPipeline.__new__(RAGPipeline)
+    pipeline.qdrant = qdrant
+    return pipeline
+
+
+class TestRetrievalCache:
+    """Exact and semantic retrieval caches"""
+
+    @pytest.mark.asyncio
+    async def test_repeat_query_is_cached(self, pipeline, qdrant):
+        first = await pipeline.retrieve("net 30", k=3, user_id="u1")
+        second = await pipeline.retrieve("net 30", k=3, user_id="u1")
+        assert first == second == qdrant.results
+        assert (qdrant.embeddings.calls, qdrant.search_calls) == (1, 1)
+
+        # Callers get their own list
+        second.clear()
+        assert await pipeline.retrieve("net 30", k=3, user_id="u1") == qdrant.results
+
+    @pytest.mark.asyncio
+    async def test_filters_are_part_of_the_key(self, pipeline, qdrant):
+        await pipeline.retrieve("net 30", k=3, user_id="u1")
+        await pipeline.retrieve("net 30", k=3, user_id="u2")
+        await pipeline.retrieve("net 30", k=5, user_id="u1")
+        assert qdrant.search_calls == 3
+
+    @pytest.mark.asyncio
+    async def test_semantically_identical_queries_share_a_search(self, pipeline, qdrant):
+        await pipeline.retrieve("net 30", k=3)
+        await pipeline.retrieve("Net 30?", k=3)
+        assert (qdrant.embeddings.calls, qdrant.search_calls) == (2, 1)
+
+    @pytest.mark.asyncio
+    async def test_empty_results_are_not_cached(self, pipeline, qdrant):
+        qdrant.results = []
+        assert await pipeline.retrieve("net 30") == []
+        assert await pipeline.retrieve("net 30") == []
+        assert qdrant.search_calls == 2
+
+    @pytest.mark.asyncio
+    async def test_clear_cache_forces_a_new_search(self, pipeline, qdrant):
+        await pipeline.retrieve("net 30")
+        RAGPipeline.clear_cache()
+        await pipeline.retrieve("net 30")
+        assert qdrant.search_calls == 2
+
+
+class TestInflightCoalescing:
+    """Concurrent misses for the same key share one embedding + search"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_coalesce(self, pipeline, qdrant):
+        qdrant.gate = asyncio.Event()
+        tasks = [asyncio.create_task(pipeline.retrieve("net 30", user_id="u1")) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert len(RAGPipeline._inflight) == 1
+
+        qdrant.gate.set()
+        results = await asyncio.gather(*tasks)
+        assert all(r == qdrant.results for r in results)
+        assert (qdrant.embeddings.calls, qdrant.search_calls) == (1, 1)
+        assert RAGPipeline._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_the_search(self, pipeline, qdrant):
+        qdrant.gate = asyncio.Event()
+        leaver = asyncio.create_task(pipeline.retrieve("net 30"))
+        stayer = asyncio.create_task(pipeline.retrieve("net 30"))
+        await asyncio.sleep(0)
+
+        leaver.cancel()
+        qdrant.gate.set()
+        assert await stayer == qdrant.results
+        assert leaver.cancelled()
+        assert qdrant.search_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_different_keys_do_not_coalesce(self, pipeline, qdrant):
+        qdrant.embeddings.vectors = {"net 30": [0.1], "net 60": [0.9]}
+        await asyncio.gather(pipeline.retrieve("net 30"), pipeline.retrieve("net 60"))
+        assert qdrant.search_calls == 2
+
+
+class TestBatchRollback:
+    """_add_in_batches deletes landed batches when any batch fails"""
+
+    @pytest.mark.asyncio
+    async def test_success_returns_ids_in_chunk_order(self, pipeline, qdrant):
+        pipeline.EMBED_BATCH_SIZE = 2
+        chunks = [f"chunk {i}" for i in range(5)]
+        ids = await pipeline._add_in_batches(chunks, "msa.pdf", {"user_id": "u1"})
+        assert ids == [f"msa.pdf_{i}" for i in range(5)]
+        assert qdrant.deleted == []
+
+        metadata = [doc.metadata for doc in qdrant.added]
+        assert sorted(m["chunk_index"] for m in metadata) == list(range(5))
+        assert all(m["user_id"] == "u1" for m in metadata)
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_rolls_back_the_others(self, pipeline, qdrant):
+        pipeline.EMBED_BATCH_SIZE = 2
+        qdrant.fail_at = {2}
+        with pytest.raises(RuntimeError):
+            await pipeline._add_in_batches([f"chunk {i}" for i in range(5)], "msa.pdf", {})
+        assert sorted(qdrant.deleted) == ["msa.pdf_0", "msa.pdf_1", "msa.pdf_4"]
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_delete_when_every_batch_fails(self, pipeline, qdrant):
+        pipeline.EMBED_BATCH_SIZE = 2
+        qdrant.fail_at = {0, 2, 4}
+        with pytest.raises(RuntimeError):
+            await pipeline._add_in_batches([f"chunk {i}" for i in range(5)], "msa.pdf", {})
+        assert qdrant.deleted == []
@@ -0,0 +1,197 @@
+"""
+Rate Limiter Tests
+==================
+Unit tests for lib.rate_limit: the approximate sliding-window Lua script
+(window math and in-Redis tier resolution), its Python read-side estimate,
+and the per-process deny cache.
+
+The Lua scripts run in-process on fakeredis (fakeredis[lua]); no Redis server
+or database needed.
+"""
+
+import os
+import sys
+import time
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib import rate_limit
+from lib.rate_limit import (
+    RateLimiter,
+    TIER_RATE_LIMITS,
+    _check_denied,
+    _estimate_window,
+    _get_sliding_script,
+    _remember_denied,
+    _sliding_window,
+)
+
+KEY = "rate_limit:test:sliding"
+WINDOW_MS = 1000
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    rate_limit._deny_cache.clear()
+    rate_limit._tier_cache.clear()
+    yield
+    rate_limit._deny_cache.clear()
+    rate_limit._tier_cache.clear()
+
+
+async def hit(redis, now_ms: int, limit: int):
+    """Run the sliding-window script at a fixed time; returns (allowed, estimated, reset_ms)."""
+    allowed, estimated, reset, _, _ = await _get_sliding_script(redis)(
+        keys=[KEY], args=[now_ms, WINDOW_MS, limit]
+    )
+    return int(allowed), int(estimated), int(reset)
+
+
+class TestSlidingWindowScript:
+    """Window math of _SLIDING_WINDOW_LUA"""
+
+    @pytest.mark.asyncio
+    async def test_allows_up_to_limit_then_denies(self, redis):
+        for n in range(1, 11):
+            assert await hit(redis, 100, 10) == (1, n, 900)
+        assert await hit(redis, 100, 10) == (0, 10, 900)
+
+    @pytest.mark.asyncio
+    async def test_denied_requests_are_not_counted(self, redis):
+        for _ in range(10):
+            await hit(redis, 100, 10)
+        for _ in range(5):
+            await hit(redis, 200, 10)
+        state = await redis.hmget(KEY, "epoch", "curr", "prev")
+        assert [int(v) for v in state] == [0, 10, 0]
+
+    @pytest.mark.asyncio
+    async def test_previous_window_is_weighted_by_overlap(self, redis):
+        for _ in range(10):
+            await hit(redis, 100, 10)
+
+        # Halfway through the next window, the old 10 count as 5
+        for n in range(6, 11):
+            allowed, estimated, _ = await hit(redis, 1500, 10)
+            assert (allowed, estimated) == (1, n)
+
+        # Full again; one more is allowed once the old window's weight drops by one request
+        allowed, estimated, reset = await hit(redis, 1500, 10)
+        assert (allowed, estimated) == (0, 10)
+        assert reset == 1
+
+    @pytest.mark.asyncio
+    async def test_gap_of_two_windows_resets(self, redis):
+        for _ in range(10):
+            await hit(redis, 100, 10)
+        assert await hit(redis, 2100, 10) == (1, 1, 900)
+
+    @pytest.mark.asyncio
+    async def test_key_expires_after_two_windows(self, redis):
+        await hit(redis, 100, 10)
+        assert 0 < await redis.pttl(KEY) <= 2 * WINDOW_MS
+
+
+class TestTierResolution:
+    """Limit resolved inside the script from the tier cached in Redis"""
+
+    @pytest.mark.asyncio
+    async def test_uncached_tier_records_nothing(self, redis):
+        assert await _sliding_window(redis, KEY, 3600, tier_key="tier:u1") is None
+        assert not await redis.exists(KEY)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("tier", list(TIER_RATE_LIMITS))
+    async def test_cached_tier_sets_limit(self, redis, tier):
+        await redis.set("tier:u1", tier)
+        allowed, count, _, limit, resolved = await _sliding_window(redis, KEY, 3600, tier_key="tier:u1")
+        assert (allowed, count, resolved) == (True, 1, tier)
+        assert limit == TIER_RATE_LIMITS[tier]["requests_per_hour"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_tier_falls_back_to_free(self, redis):
+        await redis.set("tier:u1", "platinum")
+        _, _, _, limit, resolved = await _sliding_window(redis, KEY, 3600, tier_key="tier:u1")
+        assert resolved == "platinum"
+        assert limit == TIER_RATE_LIMITS["free"]["requests_per_hour"]
+
+    @pytest.mark.asyncio
+    async def test_explicit_limit_ignores_tier(self, redis):
+        await redis.set("tier:u1", "enterprise")
+        _, _, _, limit, resolved = await _sliding_window(redis, KEY, 3600, limit=3)
+        assert (limit, resolved) == (3, "")
+
+
+class TestEstimateWindow:
+    """_estimate_window mirrors the script's estimate for read-only callers"""
+
+    def test_same_window(self, monkeypatch):
+        monkeypatch.setattr(rate_limit.time, "time", lambda: 10.25)
+        assert _estimate_window([b"10", b"4", b"6"], 1) == 4 + 5  # ceil(6 * 0.75)
+
+    def test_previous_window_rolls_over(self, monkeypatch):
+        monkeypatch.setattr(rate_limit.time, "time", lambda: 11.5)
+        assert _estimate_window([b"10", b"8", b"2"], 1) == 4  # curr becomes prev: ceil(8 * 0.5)
+
+    def test_stale_or_missing_state(self, monkeypatch):
+        monkeypatch.setattr(rate_limit.time, "time", lambda: 20.5)
+        assert _estimate_window([b"10", b"8", b"2"], 1) == 0
+        assert _estimate_window([None, None, None], 1) == 0
+
+    @pytest.mark.asyncio
+    async def test_matches_script(self, redis):
+        for _ in range(3):
+            await _sliding_window(redis, KEY, 3600, limit=10)
+        state = await redis.hmget(KEY, "epoch", "curr", "prev")
+        assert _estimate_window(state, 3600) == 3
+
+
+class TestDenyCache:
+    """Denials short-circuit Redis until their reset"""
+
+    def test_remember_and_check(self):
+        _remember_denied(("u1", "burst"), 30, 5)
+        reset_in, limit = _check_denied(("u1", "burst"))
+        assert limit == 5
+        assert 29 <= reset_in <= 30
+        assert _check_denied(("u2", "burst")) is None
+
+    def test_zero_reset_is_not_cached(self):
+        _remember_denied(("u1", "burst"), 0, 5)
+        assert _check_denied(("u1", "burst")) is None
+
+    def test_expired_denial_is_dropped(self, monkeypatch):
+        _remember_denied(("u1", "burst"), 30, 5)
+        later = time.monotonic() + 31
+        monkeypatch.setattr(rate_limit.time, "monotonic", lambda: later)
+        assert _check_denied(("u1", "burst")) is None
+        assert ("u1", "burst") not in rate_limit._deny_cache
+
+    @pytest.mark.asyncio
+    async def test_denial_skips_redis(self, redis, monkeypatch):
+        monkeypatch.setattr(rate_limit, "get_redis", lambda: redis)
+        for _ in range(2):
+            await RateLimiter.check_rate_limit("u1", limit=2, window=60)
+        with pytest.raises(HTTPException) as exc:
+            await RateLimiter.check_rate_limit("u1", limit=2, window=60)
+        assert exc.value.status_code == 429
+
+        # Redis is no longer consulted while the denial stands
+        class Unreachable:
+            def __getattr__(self, name):
+                raise AssertionError(f"Redis used: {name}")
+
+        monkeypatch.setattr(rate_limit, "get_redis", lambda: Unreachable())
+        with pytest.raises(HTTPException) as exc:
+            await RateLimiter.check_rate_limit("u1", limit=2, window=60)
+        assert exc.value.status_code == 429
+        assert exc.value.detail["limit"] == 2
@@ -0,0 +1,73 @@
+"""
+Redis Cache Encoding Tests
+==========================
+Unit tests for the msgpack/zstd cache codec and pool stats in lib.redis_client.
+No Redis server needed.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib import redis_client
+from lib.redis_client import COMPRESS_THRESHOLD, _decode, _encode
+
+
+class TestCacheCodec:
+    """_encode/_decode round trips and the leading tag byte"""
+
+    def test_small_value_is_raw_msgpack(self):
+        value = {"query": "net 30", "k": 5, "hits": [1, 2, 3]}
+        data = _encode(value)
+        assert data[:1] == b"R"
+        assert _decode(data) == value
+
+    def test_large_value_is_zstd_compressed(self):
+        value = {"context": "payment terms " * 500}
+        data = _encode(value)
+        assert data[:1] == b"Z"
+        assert len(data) < COMPRESS_THRESHOLD
+        assert _decode(data) == value
+
+    def test_threshold_is_exclusive(self):
+        # 3-byte msgpack str16 header: packs to exactly the threshold, so stays raw
+        value = "x" * (COMPRESS_THRESHOLD - 3)
+        data = _encode(value)
+        assert len(data) - 1 == COMPRESS_THRESHOLD
+        assert data[:1] == b"R"
+        assert _decode(data) == value
+
+        # One byte over compresses
+        assert _encode(value + "x")[:1] == b"Z"
+
+    @pytest.mark.parametrize("value", [None, 0, -1, 3.5, "", "ünïcødé", b"\x00\xff", [], {}, [{"a": [1, {"b": None}]}]])
+    def test_round_trip(self, value):
+        assert _decode(_encode(value)) == value
+
+
+class TestPoolStats:
+    """get_redis_pool_stats only reports counts the pool exposes"""
+
+    def test_not_connected(self, monkeypatch):
+        monkeypatch.setattr(redis_client, "_redis_pool", None)
+        assert redis_client.get_redis_pool_stats() is None
+
+    def test_counts_when_exposed(self, monkeypatch):
+        class Pool:
+            max_connections = 10
+            _in_use_connections = {object(), object()}
+            _available_connections = [object()]
+
+        monkeypatch.setattr(redis_client, "_redis_pool", Pool())
+        assert redis_client.get_redis_pool_stats() == {"max": 10, "in_use": 2, "idle": 1}
+
+    def test_max_only_when_internals_missing(self, monkeypatch):
+        class Pool:
+            max_connections = 10
+            _in_use_connections = None
+
+        monkeypatch.setattr(redis_client, "_redis_pool", Pool())
+        assert redis_client.get_redis_pool_stats() == {"max": 10}
@@ -0,0 +1,62 @@
+"""
+Tool Output Equivalence Tests
+=============================
+The precompiled/fused matchers in communication_tools and contract_tools must
+produce exactly what the original per-call regex implementations did.
+tests/data/tool_outputs.json holds outputs recorded from those originals.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.tools.communication_tools import SENTIMENT_LEXICONS, analyze_sentiment, translate_message
+from lib.tools.contract_tools import analyze_contract_clauses
+
+with open(os.path.join(os.path.dirname(__file__), "data", "tool_outputs.json"), encoding="utf-8") as f:
+    GOLDEN = json.load(f)
+
+
+class TestCommunicationTools:
+    """analyze_sentiment and translate_message"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("case", GOLDEN["sentiment"], ids=lambda c: c["text"][:30])
+    async def test_analyze_sentiment(self, case):
+        assert await analyze_sentiment.ainvoke({"text": case["text"]}) == case["expected"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("case", GOLDEN["translate"], ids=lambda c: f"{c['target_language']}-{c['formality']}")
+    async def test_translate_message(self, case):
+        args = {k: case[k] for k in ("text", "target_language", "formality")}
+        assert await translate_message.ainvoke(args) == case["expected"]
+
+    def test_no_lexicon_term_is_a_prefix_of_another(self):
+        # The lexicon lookahead reports one term per position; a prefix would hide the longer term
+        terms = sorted(set().union(*SENTIMENT_LEXICONS.values()))
+        assert not [(a, b) for a, b in zip(terms, terms[1:]) if b.startswith(a)]
+
+
+class TestContractTools:
+    """analyze_contract_clauses"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("case", GOLDEN["clauses"], ids=lambda c: c["contract_text"][:30])
+    async def test_analyze_contract_clauses(self, case):
+        args = {"contract_text": case["contract_text"]}
+        if case["clause_types"] is not None:
+            args["clause_types"] = case["clause_types"]
+        assert await analyze_contract_clauses.ainvoke(args) == case["expected"]
+
+    @pytest.mark.asyncio
+    async def test_excerpt_offsets_survive_case_folding(self):
+        # 'İ'.lower() is two characters; the excerpt must still centre on the match
+        contract = "İ" * 150 + " Payment terms: Net 30. " + "x" * 150
+        output = await analyze_contract_clauses.ainvoke({"contract_text": contract, "clause_types": ["payment"]})
+        excerpt = output.split("```\n")[1].removesuffix("...\n")
+        start = contract.index("Payment terms") - 100
+        assert excerpt == contract[start:start + 200]